@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Batch runner: scans many images on one shared process pool and writes a
+# single consolidated report, instead of one main.py process per image.
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from disk_parser import DiskParser
+from fat32_parser import FAT32Parser
+from signature_verifier import verify_signatures
+
+IMAGE_PATTERNS = ("*.img", "*.dd", "*.raw", "*.bin")
+
+
+def load_images(source: str):
+    """Return [(image_id, path)] from a directory of images or a manifest file.
+
+    Manifest lines are either `path` or `image_id,path`; blank lines and lines
+    starting with '#' are ignored. Relative paths are resolved against the
+    manifest's directory.
+    """
+    if os.path.isdir(source):
+        paths = sorted({p for pat in IMAGE_PATTERNS for p in glob.glob(os.path.join(source, pat))})
+        return [(os.path.splitext(os.path.basename(p))[0], p) for p in paths]
+
+    images = []
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "," in line:
+                image_id, path = (part.strip() for part in line.split(",", 1))
+            else:
+                path = line
+                image_id = os.path.splitext(os.path.basename(path))[0]
+            images.append((image_id, os.path.join(base, path)))
+    return images
+
+
+def _check_signatures(dp, fat, entries, workers: int):
+    """Header signature for each entry with data; same check as main.py --scan-sigs."""
+    return verify_signatures(dp, fat, entries, workers=workers)[0]
+
+
+def scan_image(image_id: str, path: str, per_image_workers: int = 1) -> dict:
+    """Parse one image and check its signatures. Never raises; failures go in `error`."""
+    try:
+        dp = DiskParser(path)
+        fat = FAT32Parser(dp)
+        entries = fat.scan_root_dir_recursive()
+        checks = _check_signatures(dp, fat, entries, per_image_workers)
+        return {"image_id": image_id, "path": path, "entries": entries, "checks": checks, "error": None}
+    except Exception as ex:
+        return {"image_id": image_id, "path": path, "entries": [], "checks": {}, "error": f"{type(ex).__name__}: {ex}"}
+
+
+def run_batch(images, workers: int = None, per_image_workers: int = 1, on_result=None):
+    """Scan `images` ([(image_id, path)]) across one process pool.
+
+    `workers` caps how many images are processed at once (the global limit);
+    `per_image_workers` caps the reader threads any single image may use.
+    Results come back in input order.
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(scan_image, image_id, path, per_image_workers): i
+                   for i, (image_id, path) in enumerate(images)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as ex:
+                # e.g. a worker process died; keep going with the rest of the batch
+                image_id, path = images[i]
+                res = {"image_id": image_id, "path": path, "entries": [], "checks": {}, "error": f"{type(ex).__name__}: {ex}"}
+            results[i] = res
+            if on_result:
+                on_result(res)
+    return [results[i] for i in range(len(images))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan many disk images with a shared worker pool")
+    parser.add_argument("source", help="Directory of images or a manifest file (path or image_id,path per line)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Images processed concurrently")
+    parser.add_argument("--per-image-workers", type=int, default=1, help="Reader threads per image")
+    parser.add_argument("--report", metavar="OUT", default="batch_report.csv", help="Consolidated CSV report")
+    args = parser.parse_args()
+
+    images = load_images(args.source)
+    if not images:
+        print("No images found.")
+        return 1
+
+    def show(res):
+        if res["error"]:
+            print(f"[{res['image_id']}] FAILED: {res['error']}", file=sys.stderr)
+        else:
+            print(f"[{res['image_id']}] {len(res['entries'])} entries")
+
+    results = run_batch(images, args.workers, args.per_image_workers, on_result=show)
+
+    # imported here so pool workers never pay for pandas
+    from reporter import generate_batch_report
+    report_path = generate_batch_report(results, out=args.report)
+    failed = sum(1 for r in results if r["error"])
+    print(f"Processed {len(results)} images ({failed} failed). Report written to {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# Signature carver for JPEGs embedded anywhere in the FAT32 data region.
+#
+# This is the reusable version of whole.scan_entire_image_for_jpeg /
+# extract_jpeg_from_cluster: it takes its geometry from the BPB instead of
+# hard-coded constants and reads the image in large chunks.
+import os
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+from jpeg_validator import score_candidates
+
+JPEG_SOI = b"\xFF\xD8\xFF"
+JPEG_EOI = b"\xFF\xD9"
+
+
+@dataclass
+class CarveHit:
+    offset: int
+    cluster: int
+    size: int = 0
+    path: Optional[str] = None
+    score: Optional[float] = None
+
+
+class Carver:
+    # how many carved candidates are held in memory for one validation batch
+    BATCH = 64
+    # bytes of carved spans held before validating and writing them
+    BATCH_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, disk_parser, bpb, chunk_size: int = 1024 * 1024, max_size: int = 10 * 1024 * 1024,
+                 min_score: Optional[float] = None, decode: bool = False, workers: int = 4):
+        """`min_score` enables the jpeg_validator stage: candidates scoring below it are not written."""
+        self.dp = disk_parser
+        self.bpb = bpb
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.min_score = min_score
+        self.decode = decode
+        self.workers = workers
+        # callables(pos, data) fed every chunk read by scan()/run(), so other
+        # passes (e.g. slack_scanner) can share the streaming read
+        self.observers = []
+        self.cluster_size = bpb.sectors_per_cluster * bpb.bytes_per_sector
+        self.data_start = (bpb.reserved_sector_count + bpb.num_fats * bpb.fat_size_32) * bpb.bytes_per_sector
+        self.data_end = bpb.total_sectors * bpb.bytes_per_sector
+
+    def offset_to_cluster(self, offset: int) -> int:
+        return 2 + (offset - self.data_start) // self.cluster_size
+
+    def _scan_chunk(self, pos: int, end: int):
+        """Scan one chunk at `pos`; returns (hits, bytes consumed), consumed is 0 at EOF."""
+        limit = min(self.chunk_size, end - pos)
+        # read a little past the chunk so a signature split across chunks is still seen once
+        data = self.dp.read_bytes(pos, limit + len(JPEG_SOI) - 1)
+        if not data:
+            return [], 0
+        for observe in self.observers:
+            observe(pos, data[:limit])
+        hits = []
+        idx = data.find(JPEG_SOI)
+        while idx != -1 and idx < limit:
+            hits.append(CarveHit(offset=pos + idx, cluster=self.offset_to_cluster(pos + idx)))
+            idx = data.find(JPEG_SOI, idx + 1)
+        return hits, limit
+
+    def scan(self, start: Optional[int] = None, end: Optional[int] = None) -> List[CarveHit]:
+        """Return every JPEG start-of-image signature between `start` and `end` (default: whole data region)."""
+        pos = self.data_start if start is None else start
+        end = self.data_end if end is None else end
+        hits = []
+        while pos < end:
+            chunk_hits, consumed = self._scan_chunk(pos, end)
+            if not consumed:
+                break
+            hits.extend(chunk_hits)
+            pos += consumed
+        return hits
+
+    def scan_runs(self, runs) -> List[CarveHit]:
+        """Scan only the given [(first_cluster, last_cluster)] runs, e.g. from EntropyMap.runs()."""
+        hits = []
+        for first, last in runs:
+            start = self.data_start + (first - 2) * self.cluster_size
+            hits.extend(self.scan(start, min(start + (last - first + 1) * self.cluster_size, self.data_end)))
+        return hits
+
+    def carve(self, offset: int) -> Optional[bytes]:
+        """Read from `offset` up to and including the first JPEG end marker, or None if not found."""
+        buffer = b""
+        pos = offset
+        while len(buffer) < self.max_size:
+            chunk = self.dp.read_bytes(pos, min(self.chunk_size, self.max_size - len(buffer)))
+            if not chunk:
+                return None
+            # search from one byte back in case the marker straddles the chunk boundary
+            search_from = max(len(buffer) - 1, 0)
+            buffer += chunk
+            pos += len(chunk)
+            idx = buffer.find(JPEG_EOI, search_from)
+            if idx != -1:
+                return buffer[:idx + 2]
+        return None
+
+    def _carve_batch(self, hits: List[CarveHit], out_dir: str):
+        """Carve `hits`, validate them together and write the ones that pass.
+
+        Carved spans are flushed whenever they add up to BATCH_BYTES, so a
+        batch of maximum-size candidates never sits in memory at once.
+        """
+        carved = []
+        held = 0
+        for hit in hits:
+            data = self.carve(hit.offset)
+            if data is not None:
+                hit.size = len(data)
+                carved.append((hit, data))
+                held += len(data)
+                if held >= self.BATCH_BYTES:
+                    self._write_valid(carved, out_dir)
+                    carved, held = [], 0
+        self._write_valid(carved, out_dir)
+
+    def _write_valid(self, carved, out_dir: str):
+        if self.min_score is not None and carved:
+            checks = score_candidates([data for _, data in carved], self.decode, self.workers)
+            for (hit, _), chk in zip(carved, checks):
+                hit.score = chk.score
+            carved = [(hit, data) for hit, data in carved if hit.score >= self.min_score]
+        for hit, data in carved:
+            hit.path = os.path.join(out_dir, f"carved_{hit.cluster}_{hit.offset}.jpg")
+            with open(hit.path, "wb") as f:
+                f.write(data)
+
+    def carve_all(self, hits: List[CarveHit], out_dir: str) -> List[CarveHit]:
+        """Carve each hit to `out_dir`; returns the hits that produced a file."""
+        os.makedirs(out_dir, exist_ok=True)
+        for i in range(0, len(hits), self.BATCH):
+            self._carve_batch(hits[i:i + self.BATCH], out_dir)
+        return [hit for hit in hits if hit.path]
+
+    def run(self, out_dir: str, checkpoint=None, progress=None, resume: bool = False) -> List[CarveHit]:
+        """Scan and carve the whole data region chunk by chunk.
+
+        With a `checkpoint.Checkpoint`, the scan position, hits and carved
+        outputs are persisted periodically; `resume=True` continues from the
+        saved position instead of the start of the data region. `progress`
+        is an optional `checkpoint.ProgressLine`.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        identity = {"image": os.path.abspath(self.dp.image_path), "data_start": self.data_start, "data_end": self.data_end}
+        state = checkpoint.load() if checkpoint and resume else None
+        if state is not None:
+            if state.get("identity") != identity:
+                raise ValueError(f"Checkpoint {checkpoint.path} belongs to a different image or geometry.")
+        else:
+            state = {"identity": identity, "position": self.data_start, "hits": []}
+
+        pos = state["position"]
+        hits = [CarveHit(**h) for h in state["hits"]]
+        while pos < self.data_end:
+            chunk_hits, consumed = self._scan_chunk(pos, self.data_end)
+            if not consumed:
+                break
+            for i in range(0, len(chunk_hits), self.BATCH):
+                self._carve_batch(chunk_hits[i:i + self.BATCH], out_dir)
+            # keep uncarved and rejected hits too so the report shows every signature
+            for hit in chunk_hits:
+                hits.append(hit)
+                state["hits"].append(asdict(hit))
+            pos += consumed
+            # only whole chunks are recorded, so a resumed run never repeats or skips a range
+            state["position"] = pos
+            if checkpoint:
+                checkpoint.maybe_save(state)
+            if progress:
+                progress.update(pos - self.data_start, len(hits))
+
+        state["complete"] = True
+        if checkpoint:
+            checkpoint.save(state)
+        if progress:
+            progress.finish(pos - self.data_start, len(hits))
+        return hits
@@ -0,0 +1,74 @@
+# Checkpoint persistence and a live progress line for long scans.
+import json
+import os
+import sys
+import time
+
+
+class Checkpoint:
+    """JSON checkpoint written atomically at most every `interval` seconds."""
+
+    def __init__(self, path: str, interval: float = 30.0):
+        self.path = path
+        self.interval = interval
+        self._last = time.monotonic()
+
+    def load(self):
+        """Return the saved state, or None if there is no checkpoint yet."""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, state: dict):
+        # write to a temp file and rename so a crash never leaves a torn checkpoint
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._last = time.monotonic()
+
+    def maybe_save(self, state: dict):
+        if time.monotonic() - self._last >= self.interval:
+            self.save(state)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _fmt_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ProgressLine:
+    """Single-line progress display with throughput and ETA, redrawn in place."""
+
+    def __init__(self, total: int, done: int = 0, stream=None, interval: float = 0.5):
+        self.total = total
+        self.start_done = done
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.started = time.monotonic()
+        self._last = 0.0
+
+    def update(self, done: int, hits: int = 0, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = max(now - self.started, 1e-9)
+        # rate only counts work done in this process, not what a resumed checkpoint skipped
+        rate = (done - self.start_done) / elapsed
+        pct = 100.0 * done / self.total if self.total else 100.0
+        eta = _fmt_eta((self.total - done) / rate) if rate > 0 else "--:--:--"
+        self.stream.write(f"\r{pct:6.2f}% {rate / (1024 * 1024):8.1f} MB/s ETA {eta} hits={hits}")
+        self.stream.flush()
+
+    def finish(self, done: int, hits: int = 0):
+        self.update(done, hits, force=True)
+        self.stream.write("\n")
+        self.stream.flush()
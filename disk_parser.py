@@ -1,5 +1,8 @@
+import mmap
+import os
 import struct
 from dataclasses import dataclass
+from metrics import METRICS
 
 @dataclass
 class FAT32BPB:
@@ -19,7 +22,11 @@ class DiskParser:
         """Read `size` bytes starting at `offset` from the raw image."""
         with open(self.image_path, "rb") as f:
             f.seek(offset)
-            return f.read(size)
+            data = f.read(size)
+        if METRICS.enabled:
+            METRICS.incr("read_calls")
+            METRICS.incr("bytes_read", len(data))
+        return data
 
     def read_struct(self, offset: int, fmt: str):
         size = struct.calcsize(fmt)
@@ -54,3 +61,38 @@ class DiskParser:
             root_cluster=root_cluster,
             total_sectors=total_sectors
         )
+
+class MappedDiskParser(DiskParser):
+    """DiskParser over one read-only mmap of the image.
+
+    Reads are slices of the shared map, so any number of threads can use
+    the same instance without reopening or seeking the file.
+    """
+    def __init__(self, image_path: str):
+        super().__init__(image_path)
+        self._file = open(image_path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def read_bytes(self, offset: int, size: int) -> bytes:
+        data = self._map[offset:offset + size]
+        if METRICS.enabled:
+            METRICS.incr("read_calls")
+            METRICS.incr("bytes_read", len(data))
+        return data
+
+    def view(self, offset: int, size: int) -> memoryview:
+        """Zero-copy view of `size` bytes at `offset` (release it before close())."""
+        return memoryview(self._map)[offset:offset + size]
+
+    def close(self):
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,107 @@
+# Per-cluster byte statistics and a compact classification map of the data region.
+#
+# Header-based signature checks miss mid-file clusters of deleted files. This
+# pass computes a byte histogram, Shannon entropy and a few cheap features for
+# every cluster, vectorised with NumPy over large blocks, and assigns each
+# cluster one class code. numpy is imported here, so callers that only need it
+# for this pass should import the module lazily.
+from dataclasses import dataclass
+
+import numpy as np
+
+ZERO, TEXT, BINARY, COMPRESSED, ENCRYPTED = range(5)
+CLASS_NAMES = ("zero", "text", "binary", "compressed", "encrypted")
+
+# bytes counted as text: TAB, LF, CR and printable ASCII
+_TEXT_BYTES = np.zeros(256, dtype=bool)
+_TEXT_BYTES[[9, 10, 13]] = True
+_TEXT_BYTES[32:127] = True
+
+TEXT_RATIO = 0.95
+HIGH_ENTROPY = 7.2  # bits per byte
+# chi-square of a uniform-random cluster against the flat distribution is ~255;
+# compressed data sits well above that
+CHI2_RANDOM = 350.0
+
+
+@dataclass
+class EntropyMap:
+    first_cluster: int
+    cluster_size: int
+    classes: np.ndarray   # uint8, one CLASS code per cluster
+    entropy: np.ndarray   # float16 bits per byte
+    ff00: np.ndarray      # uint16 count of FF 00 pairs (JPEG byte stuffing)
+
+    def counts(self) -> dict:
+        values = np.bincount(self.classes, minlength=len(CLASS_NAMES))
+        return {name: int(values[i]) for i, name in enumerate(CLASS_NAMES)}
+
+    def clusters(self, *kinds: int) -> np.ndarray:
+        """Cluster numbers whose class is one of `kinds`."""
+        return np.flatnonzero(np.isin(self.classes, kinds)) + self.first_cluster
+
+    def jpeg_like(self) -> np.ndarray:
+        """Boolean mask of compressed clusters with byte stuffing, i.e. likely JPEG scan data."""
+        return (self.classes == COMPRESSED) & (self.ff00 > 0)
+
+    def runs(self, *kinds: int):
+        """[(first_cluster, last_cluster)] runs of consecutive clusters in `kinds`."""
+        mask = np.isin(self.classes, kinds).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], mask, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+        return [(int(s) + self.first_cluster, int(e) + self.first_cluster) for s, e in zip(starts, ends)]
+
+    def save(self, path: str):
+        np.savez_compressed(path, first_cluster=self.first_cluster, cluster_size=self.cluster_size,
+                            classes=self.classes, entropy=self.entropy, ff00=self.ff00)
+
+    @classmethod
+    def load(cls, path: str) -> "EntropyMap":
+        with np.load(path) as z:
+            return cls(int(z["first_cluster"]), int(z["cluster_size"]), z["classes"], z["entropy"], z["ff00"])
+
+
+def cluster_stats(block: bytes, cluster_size: int):
+    """Return (classes, entropy, ff00) for every whole cluster in `block`."""
+    arr = np.frombuffer(block, dtype=np.uint8)
+    n = len(arr) // cluster_size
+    arr = arr[:n * cluster_size].reshape(n, cluster_size)
+
+    # one bincount over (row * 256 + byte) gives every row's histogram at once
+    hist = np.bincount((arr + (np.arange(n, dtype=np.int64) * 256)[:, None]).ravel(),
+                       minlength=n * 256).reshape(n, 256)
+    p = hist / cluster_size
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = np.where(p > 0, -p * np.log2(p), 0.0).sum(axis=1)
+    expected = cluster_size / 256
+    chi2 = ((hist - expected) ** 2 / expected).sum(axis=1)
+    text = hist[:, _TEXT_BYTES].sum(axis=1) / cluster_size
+    ff00 = ((arr[:, :-1] == 0xFF) & (arr[:, 1:] == 0x00)).sum(axis=1)
+
+    classes = np.full(n, BINARY, dtype=np.uint8)
+    high = entropy >= HIGH_ENTROPY
+    classes[high] = COMPRESSED
+    # uniform histograms without JPEG byte stuffing look like ciphertext
+    classes[high & (chi2 < CHI2_RANDOM) & (ff00 == 0)] = ENCRYPTED
+    classes[text >= TEXT_RATIO] = TEXT
+    classes[hist[:, 0] == cluster_size] = ZERO
+    return classes, entropy.astype(np.float16), np.minimum(ff00, 0xFFFF).astype(np.uint16)
+
+
+def build_map(disk_parser, bpb, block_clusters: int = 256) -> EntropyMap:
+    """Classify every cluster of the data region, reading `block_clusters` clusters per read."""
+    cluster_size = bpb.sectors_per_cluster * bpb.bytes_per_sector
+    data_start = (bpb.reserved_sector_count + bpb.num_fats * bpb.fat_size_32) * bpb.bytes_per_sector
+    data_end = bpb.total_sectors * bpb.bytes_per_sector
+    parts = ([], [], [])
+    pos = data_start
+    while pos < data_end:
+        block = disk_parser.read_bytes(pos, min(block_clusters * cluster_size, data_end - pos))
+        if len(block) < cluster_size:
+            break
+        for out, values in zip(parts, cluster_stats(block, cluster_size)):
+            out.append(values)
+        pos += len(block) - len(block) % cluster_size
+    classes, entropy, ff00 = (np.concatenate(p) if p else np.empty(0) for p in parts)
+    return EntropyMap(2, cluster_size, classes.astype(np.uint8), entropy.astype(np.float16), ff00.astype(np.uint16))
@@ -0,0 +1,240 @@
+# Columnar storage for directory entries.
+#
+# A list of per-entry dataclass records costs several hundred bytes per entry
+# (the object, its dict, raw_name bytes, two strings and up to three
+# datetimes). EntryTable keeps one typed array per field. Names are stored
+# NUL-terminated in one byte blob with an offset column, so a name costs its
+# own length plus 5 bytes rather than a str object, also while the table is
+# being built. Extensions repeat a lot and are interned in a small StringPool.
+# Timestamps stay as the packed FAT date/time words and are decoded only when
+# a row asks for them.
+#
+# Iterating or indexing the table yields EntryRow tuples with the entry
+# attributes (name, ext, attr, first_cluster, filesize, deleted, entry_offset,
+# created, modified, accessed); rows are built a batch at a time. Hot loops
+# should use EntryTable.batches() instead and read the columns directly.
+from array import array
+from collections import namedtuple
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+
+# column name -> array typecode
+COLUMNS = {
+    "first_cluster": "I",
+    "filesize": "I",
+    "entry_offset": "Q",
+    "attr": "B",
+    "deleted": "B",
+    "ext": "I",           # id in the extension pool
+    "crt_date": "H",
+    "crt_time": "H",
+    "crt_tenths": "B",
+    "wrt_date": "H",
+    "wrt_time": "H",
+    "acc_date": "H",
+}
+
+# EntryRow field order; "name" comes from the packed name column
+FIELDS = ("name", "ext", "attr", "first_cluster", "filesize", "deleted", "entry_offset",
+          "crt_date", "crt_time", "crt_tenths", "wrt_date", "wrt_time", "acc_date")
+
+BATCH_ROWS = 65536
+
+
+def fat_datetime(fat_date: int, fat_time: int = 0, tenths: int = 0) -> Optional[datetime]:
+    """Decode packed FAT date/time fields; None if the date is unset or invalid."""
+    if not fat_date:
+        return None
+    try:
+        return datetime(1980 + (fat_date >> 9), (fat_date >> 5) & 0x0F, fat_date & 0x1F,
+                        fat_time >> 11, (fat_time >> 5) & 0x3F, (fat_time & 0x1F) * 2 + tenths // 100,
+                        (tenths % 100) * 10000)
+    except ValueError:
+        return None
+
+
+def _fat_date(fat_date: int) -> Optional[date]:
+    stamp = fat_datetime(fat_date)
+    return stamp.date() if stamp else None
+
+
+class StringPool:
+    """Interned strings addressed by integer id; equal strings are stored once."""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def __getitem__(self, i: int) -> str:
+        return self.strings[i]
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getstate__(self):
+        return self.strings
+
+    def __setstate__(self, strings):
+        self.strings = strings
+        self._ids = {s: i for i, s in enumerate(strings)}
+
+
+class PackedStrings:
+    """Append-only strings stored NUL-terminated in one UTF-8 blob."""
+
+    def __init__(self):
+        self._blob = bytearray()
+        self._offsets = array("I", [0])             # string i is _blob[_offsets[i]:_offsets[i + 1] - 1]
+
+    def append(self, s: str):
+        self._blob += s.encode() + b"\0"
+        self._offsets.append(len(self._blob))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < len(self):
+            raise IndexError("string index out of range")
+        return self._blob[self._offsets[i]:self._offsets[i + 1] - 1].decode()
+
+    def slice(self, start: int, stop: int) -> List[str]:
+        """Strings start..stop, decoded and split in one pass."""
+        if start >= stop:
+            return []
+        parts = self._blob[self._offsets[start]:self._offsets[stop] - 1].decode().split("\0")
+        if len(parts) == stop - start:
+            return parts
+        return [self[i] for i in range(start, stop)]   # some string holds a NUL of its own
+
+    def nbytes(self) -> int:
+        return len(self._blob) + self._offsets.itemsize * len(self._offsets)
+
+
+class EntryRow(namedtuple("EntryRow", FIELDS)):
+    """One directory entry; the FAT timestamp words are decoded on access."""
+    __slots__ = ()
+
+    @property
+    def created(self) -> Optional[datetime]:
+        return fat_datetime(self.crt_date, self.crt_time, self.crt_tenths)
+
+    @property
+    def modified(self) -> Optional[datetime]:
+        return fat_datetime(self.wrt_date, self.wrt_time)
+
+    @property
+    def accessed(self) -> Optional[date]:
+        return _fat_date(self.acc_date)
+
+
+class EntryTable:
+    """Directory entries stored column-wise; indexes and iterates as EntryRow tuples."""
+
+    def __init__(self):
+        for col, code in COLUMNS.items():
+            setattr(self, col, array(code))
+        self.names = PackedStrings()
+        self.exts = StringPool()
+
+    def append(self, name: str, ext: str, attr: int, first_cluster: int, filesize: int, deleted: bool,
+               entry_offset: int, crt_date: int = 0, crt_time: int = 0, crt_tenths: int = 0,
+               wrt_date: int = 0, wrt_time: int = 0, acc_date: int = 0):
+        """Add one entry; timestamps are the raw FAT date/time words."""
+        self.names.append(name)
+        self.ext.append(self.exts.intern(ext))
+        self.attr.append(attr)
+        self.first_cluster.append(first_cluster)
+        self.filesize.append(filesize)
+        self.deleted.append(1 if deleted else 0)
+        self.entry_offset.append(entry_offset)
+        self.crt_date.append(crt_date)
+        self.crt_time.append(crt_time)
+        self.crt_tenths.append(crt_tenths)
+        self.wrt_date.append(wrt_date)
+        self.wrt_time.append(wrt_time)
+        self.acc_date.append(acc_date)
+
+    def __len__(self):
+        return len(self.first_cluster)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step == 1:
+                return self._rows(start, stop)
+            return [self[j] for j in range(start, stop, step)]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("entry index out of range")
+        return self.take([i])[0]
+
+    def __iter__(self) -> Iterator[EntryRow]:
+        for start in range(0, len(self), BATCH_ROWS):
+            yield from self._rows(start, min(start + BATCH_ROWS, len(self)))
+
+    def _rows(self, start: int, stop: int) -> List[EntryRow]:
+        cols = self._columns(FIELDS, start, stop)
+        cols[FIELDS.index("deleted")] = map(bool, cols[FIELDS.index("deleted")])
+        return list(map(EntryRow._make, zip(*cols)))
+
+    def take(self, indexes) -> List[EntryRow]:
+        """Rows at `indexes` (any order), without slicing whole batches."""
+        cols = []
+        for col in FIELDS:
+            if col == "name":
+                names = self.names
+                cols.append([names[i] for i in indexes])
+            elif col == "ext":
+                strings, ext = self.exts.strings, self.ext
+                cols.append([strings[ext[i]] for i in indexes])
+            elif col == "deleted":
+                deleted = self.deleted
+                cols.append([bool(deleted[i]) for i in indexes])
+            else:
+                values = getattr(self, col)
+                cols.append([values[i] for i in indexes])
+        return list(map(EntryRow._make, zip(*cols)))
+
+    def _columns(self, columns, start: int, stop: int) -> list:
+        out = []
+        for col in columns:
+            if col == "name":
+                out.append(self.names.slice(start, stop))
+            elif col == "ext":
+                out.append(list(map(self.exts.strings.__getitem__, self.ext[start:stop])))
+            else:
+                out.append(getattr(self, col)[start:stop])
+        return out
+
+    def batches(self, size: int = BATCH_ROWS, columns=None) -> Iterator[dict]:
+        """Yield dicts of column slices, `size` rows at a time.
+
+        `columns` limits which columns are sliced (default: all). The name and
+        ext columns are resolved to strings; the rest are arrays.
+        """
+        columns = columns or FIELDS
+        for start in range(0, len(self), size):
+            stop = min(start + size, len(self))
+            batch = dict(zip(columns, self._columns(columns, start, stop)))
+            batch["start"] = start
+            yield batch
+
+    def display_names(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """'NAME.EXT' (or 'NAME' without an extension) for rows start..stop."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        names, exts = self._columns(("name", "ext"), start, stop)
+        return [f"{n}.{x}" if x else n for n, x in zip(names, exts)]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns, names and extensions."""
+        total = sum(getattr(self, col).itemsize * len(getattr(self, col)) for col in COLUMNS)
+        return total + self.names.nbytes() + sum(len(s) + 49 for s in self.exts.strings)
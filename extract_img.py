@@ -1,4 +1,3 @@
-from PIL import Image
 from io import BytesIO
 
 # Load the raw disk image
@@ -28,6 +27,7 @@ with open("recovered.jpg", "wb") as out:
 
 print("Recovered JPG from bytes", start, "to", end+2)
 
-# Render it (display)
+# Render it (display); PIL is only needed for this step
+from PIL import Image
 img = Image.open(BytesIO(jpg_bytes))
 img.show()  # This opens the system image viewer
@@ -1,17 +1,19 @@
-from dataclasses import dataclass
+import struct
+from array import array
 from typing import List
 from disk_parser import DiskParser
+from entry_table import EntryTable
+from metrics import METRICS
 
-@dataclass
-class DirEntry:
-    raw_name: bytes
-    name: str
-    ext: str
-    attr: int
-    first_cluster: int
-    filesize: int
-    deleted: bool
-    entry_offset: int
+# 32-byte short directory entry: name+ext, attr, NTRes, create tenths, create time,
+# create date, access date, cluster high, write time, write date, cluster low, size
+DIR_ENTRY = struct.Struct("<11sBBBHHHHHHHI")
+
+
+def decode_fat(raw: bytes, offset: int = 0, count: int = -1):
+    """FAT32 entries of `raw` as a numpy uint32 array with the top four reserved bits cleared."""
+    import numpy as np  # kept out of module import: main.py starts without numpy
+    return np.frombuffer(raw, dtype="<u4", count=count, offset=offset) & np.uint32(0x0FFFFFFF)
 
 class FAT32Parser:
     def __init__(self, disk_parser: DiskParser):
@@ -24,13 +26,44 @@ class FAT32Parser:
         offset = (data_region_sector + (cluster - 2) * self.bpb.sectors_per_cluster) * self.bpb.bytes_per_sector
         return offset
 
-    def scan_root_dir_recursive(self) -> List[DirEntry]:
+    def read_fat(self, index: int = 0) -> bytes:
+        """Raw bytes of FAT copy `index` (0 is the primary FAT)."""
+        if index >= self.bpb.num_fats:
+            raise ValueError(f"FAT #{index + 1} does not exist (num_fats={self.bpb.num_fats}).")
+        start = (self.bpb.reserved_sector_count + index * self.bpb.fat_size_32) * self.bpb.bytes_per_sector
+        return self.dp.read_bytes(start, self.bpb.fat_size_32 * self.bpb.bytes_per_sector)
+
+    def fat_table(self, index: int = 0) -> array:
+        """FAT copy `index` decoded to 28-bit cluster entries."""
+        raw = self.read_fat(index)
+        return array("I", decode_fat(raw, count=len(raw) // 4).astype("=u4").tobytes())
+
+    def cluster_chain(self, first_cluster: int, table=None, limit: int = None) -> List[int]:
+        """Follow the FAT chain from `first_cluster` (stops at EOC, a free/bad entry or a loop)."""
+        if table is None:
+            table = self.fat_table()
+        chain = []
+        seen = set()
+        c = first_cluster
+        while 2 <= c < len(table) and c not in seen:
+            chain.append(c)
+            seen.add(c)
+            if limit and len(chain) >= limit:
+                break
+            nxt = table[c]
+            if nxt >= 0x0FFFFFF7 or nxt < 2:
+                break
+            c = nxt
+        return chain
+
+    def scan_root_dir_recursive(self) -> EntryTable:
         """
         Read directory entries starting from the root cluster.
         NOTE: This simplified scanner reads a fixed number of clusters from the root cluster area.
         It will detect deleted entries (0xE5 first byte) and live entries. It does NOT follow FAT chains.
+        Entries are returned column-wise in an EntryTable (see entry_table.EntryRow for the attributes).
         """
-        entries: List[DirEntry] = []
+        entries = EntryTable()
         root = self.bpb.root_cluster
         # Safety limit: how many clusters of the root directory region to inspect
         clusters_to_read = 64
@@ -42,27 +75,23 @@ class FAT32Parser:
             data = self.dp.read_bytes(offset, size)
             if not data:
                 continue
-            for j in range(0, len(data), 32):
-                entry = data[j:j+32]
-                if len(entry) < 32:
-                    continue
-                first_byte = entry[0]
+            # decode every 32-byte entry of the cluster in one C-level pass
+            usable = len(data) - len(data) % 32
+            for j, fields in zip(range(0, usable, 32), DIR_ENTRY.iter_unpack(data[:usable])):
+                (raw_name, attr, _, crt_tenths, crt_time, crt_date, acc_date,
+                 first_cluster_high, wrt_time, wrt_date, first_cluster_low, filesize) = fields
+                first_byte = raw_name[0]
                 if first_byte == 0x00:
                     # 0x00 marks: no more entries in this directory table region
                     break
                 # Long File Name (LFN) entries have attribute 0x0F; skip them for this simple parser
-                attr = entry[11]
                 if attr == 0x0F:
                     continue
 
-                raw_name = entry[0:11]
                 deleted = (first_byte == 0xE5)
 
                 # First cluster (high + low)
-                first_cluster_high = int.from_bytes(entry[20:22], "little")
-                first_cluster_low = int.from_bytes(entry[26:28], "little")
                 first_cluster = (first_cluster_high << 16) | first_cluster_low
-                filesize = int.from_bytes(entry[28:32], "little")
 
                 # Parse name and ext carefully; if deleted, first character replaced
                 if deleted:
@@ -79,14 +108,21 @@ class FAT32Parser:
                 except Exception:
                     ext = ""
 
-                entries.append(DirEntry(
-                    raw_name=raw_name,
+                entries.append(
                     name=name,
                     ext=ext,
                     attr=attr,
                     first_cluster=first_cluster,
                     filesize=filesize,
                     deleted=deleted,
-                    entry_offset=offset + j
-                ))
+                    entry_offset=offset + j,
+                    crt_date=crt_date,
+                    crt_time=crt_time,
+                    crt_tenths=crt_tenths,
+                    wrt_date=wrt_date,
+                    wrt_time=wrt_time,
+                    acc_date=acc_date,
+                )
+        if METRICS.enabled:
+            METRICS.incr("entries_decoded", len(entries))
         return entries
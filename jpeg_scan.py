@@ -0,0 +1,223 @@
+# Resumable entropy decoding of baseline JPEG scan data.
+#
+# Reassembly uses this to test whether a candidate cluster really continues
+# a Huffman-coded stream. Decoding resumes from the bit position, block and
+# coefficient index where the previous cluster stopped, and the candidate is
+# rejected on a code that is not in the tables, a coefficient run past the
+# end of a block, or a restart marker that does not arrive exactly every
+# restart-interval MCUs. Only the tables are needed, not the pixel values,
+# so nothing is dequantised or transformed.
+import struct
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# frames whose scans use the sequential Huffman coding decoded here
+SEQUENTIAL_SOF = {0xC0, 0xC1}
+
+
+def _lookup(counts: bytes, symbols: bytes) -> Optional[list]:
+    """65536-entry table mapping a 16-bit window to (code length << 8) | symbol, 0 if no code matches."""
+    lut = [0] * 65536
+    code = k = 0
+    for length, count in enumerate(counts, 1):
+        for _ in range(count):
+            if code >= 1 << length or k >= len(symbols):
+                return None  # over-subscribed or truncated table
+            shift = 16 - length
+            lut[code << shift:(code + 1) << shift] = [(length << 8) | symbols[k]] * (1 << shift)
+            code += 1
+            k += 1
+        code <<= 1
+    return lut
+
+
+@dataclass
+class ScanSpec:
+    blocks: List[Tuple[list, list]]   # (DC table, AC table) of each block of one MCU, in order
+    restart_interval: int
+    scan_start: int                   # offset of the first entropy-coded byte
+
+
+@dataclass(frozen=True)
+class DecodeState:
+    acc: int = 0          # trailing bits not yet forming a whole symbol
+    nbits: int = 0
+    block: int = 0        # block index within the MCU
+    k: int = 0            # next coefficient index in the block (0 = DC)
+    mcus: int = 0         # MCUs completed since the last restart marker
+    ff: bool = False      # the previous chunk ended on an 0xFF byte
+    done: bool = False    # EOI (or a marker this decoder does not follow) was reached
+
+
+def parse_scan_spec(data: bytes) -> Optional[ScanSpec]:
+    """Huffman tables and MCU layout of the first scan, or None if it is not sequential Huffman."""
+    if not data.startswith(b"\xFF\xD8"):
+        return None
+    tables = {}
+    components = {}
+    restart_interval = 0
+    pos = 2
+    n = len(data)
+    while pos + 4 <= n:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1  # fill byte
+            continue
+        length = struct.unpack_from(">H", data, pos + 2)[0]
+        seg = data[pos + 4:pos + 2 + length]
+        if length < 2 or len(seg) != length - 2:
+            return None
+        if marker == 0xC4:
+            i = 0
+            while i + 17 <= len(seg):
+                counts = seg[i + 1:i + 17]
+                total = sum(counts)
+                lut = _lookup(counts, seg[i + 17:i + 17 + total])
+                if lut is None:
+                    return None
+                tables[seg[i] >> 4, seg[i] & 0x0F] = lut
+                i += 17 + total
+        elif 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if marker not in SEQUENTIAL_SOF or len(seg) < 6:
+                return None
+            for j in range(seg[5]):
+                cid, sampling = seg[6 + 3 * j], seg[7 + 3 * j]
+                components[cid] = (sampling >> 4, sampling & 0x0F)
+        elif marker == 0xDD and len(seg) >= 2:
+            restart_interval = struct.unpack_from(">H", seg)[0]
+        elif marker == 0xDA:
+            ns = seg[0] if seg else 0
+            if not ns or len(seg) < 1 + 2 * ns + 3 or seg[1 + 2 * ns:3 + 2 * ns] != b"\x00\x3F":
+                return None
+            blocks = []
+            for j in range(ns):
+                cid, sel = seg[1 + 2 * j], seg[2 + 2 * j]
+                dc, ac = tables.get((0, sel >> 4)), tables.get((1, sel & 0x0F))
+                if dc is None or ac is None or cid not in components:
+                    return None
+                h, v = components[cid] if ns > 1 else (1, 1)
+                blocks.extend([(dc, ac)] * (h * v))
+            return ScanSpec(blocks, restart_interval, pos + 2 + length)
+        pos += 2 + length
+    return None
+
+
+def decode(spec: ScanSpec, data: bytes, state: DecodeState = DecodeState()) -> Optional[DecodeState]:
+    """Continue decoding scan data `data` from `state`.
+
+    Returns the state at the end of `data` (bits of a symbol cut off at the
+    end are carried over), or None as soon as the data cannot be valid scan
+    data. After EOI, or a marker this decoder does not follow, the returned
+    state has done=True and further data is not examined.
+    """
+    if state.done:
+        return state
+    if state.ff:
+        data = b"\xFF" + data
+    acc, nbits, block, k, mcus = state.acc, state.nbits, state.block, state.k, state.mcus
+    blocks = spec.blocks
+    nblocks = len(blocks)
+    ri = spec.restart_interval
+
+    def symbols(final: bool) -> bool:
+        """Decode whole symbols from the bit buffer; False on invalid data."""
+        nonlocal acc, nbits, block, k, mcus
+        while nbits:
+            if ri and mcus == ri:
+                # interval complete: only 1-bit padding may remain before the RST marker
+                return nbits < 8 and acc == (1 << nbits) - 1
+            if final and nbits < 8 and acc == (1 << nbits) - 1:
+                return True  # padding before a marker
+            if nbits >= 16:
+                window = (acc >> (nbits - 16)) & 0xFFFF
+            elif final:
+                window = ((acc << (16 - nbits)) | ((1 << (16 - nbits)) - 1)) & 0xFFFF
+            else:
+                return True
+            dc, ac = blocks[block]
+            entry = (ac if k else dc)[window]
+            if not entry:
+                return False
+            length, sym = entry >> 8, entry & 0xFF
+            size = sym if not k else sym & 0x0F
+            if size > (11 if not k else 10):
+                return False
+            if length + size > nbits:
+                return not final  # wait for the rest of the symbol
+            nbits -= length + size
+            acc &= (1 << nbits) - 1
+            if not k:
+                k = 1
+            elif sym == 0x00:
+                k = 64  # EOB
+            else:
+                k += (sym >> 4) + 1  # ZRL (0xF0) skips 16 zeros the same way
+                if k > 64:
+                    return False  # run past the last coefficient
+            if k == 64:
+                k = 0
+                block += 1
+                if block == nblocks:
+                    block = 0
+                    mcus += 1
+        return True
+
+    def feed(chunk: bytes):
+        nonlocal acc, nbits
+        acc = (acc << (8 * len(chunk))) | int.from_bytes(chunk, "big")
+        nbits += 8 * len(chunk)
+
+    pos = 0
+    n = len(data)
+    while pos < n:
+        i = data.find(b"\xFF", pos)
+        end = n if i == -1 else i
+        if end > pos:
+            feed(data[pos:end])
+            if not symbols(False):
+                return None
+        if i == -1:
+            break
+        if i + 1 == n:
+            return DecodeState(acc, nbits, block, k, mcus, ff=True)
+        nxt = data[i + 1]
+        if nxt == 0x00:
+            feed(b"\xFF")  # stuffed data byte
+            if not symbols(False):
+                return None
+            pos = i + 2
+            continue
+        if nxt == 0xFF:
+            pos = i + 1  # fill byte before a marker
+            continue
+        # a marker ends the segment: the bits left must decode exactly, up to padding
+        if not symbols(True):
+            return None
+        if 0xD0 <= nxt <= 0xD7:
+            if not ri or mcus != ri or block or k:
+                return None
+            acc = nbits = mcus = 0
+            pos = i + 2
+            continue
+        # EOI, or a table/scan marker starting something this decoder does not follow
+        return DecodeState(done=True)
+    return DecodeState(acc, nbits, block, k, mcus)
+
+
+def decode_from_header(data: bytes) -> Tuple[Optional[ScanSpec], Optional[DecodeState]]:
+    """Parse the scan spec of a JPEG header chunk and decode the scan data it contains."""
+    spec = parse_scan_spec(data)
+    if spec is None:
+        return None, None
+    return spec, decode(spec, data[spec.scan_start:])
+
+
+def is_decodable(data: bytes) -> Optional[bool]:
+    """True if the whole scan of a JPEG decodes cleanly; None if it is not sequential Huffman."""
+    spec, state = decode_from_header(data)
+    if spec is None:
+        return None
+    return state is not None and state.done
+
@@ -0,0 +1,163 @@
+# Cheap validation of carved JPEG candidates before they are written out.
+#
+# Any FF D8 FF ... FF D9 span looks like a JPEG to the carver. This module
+# walks the marker segments and checks the entropy-coded data for illegal
+# markers, which rejects most garbage without decoding. An optional partial
+# decode with PIL's draft mode confirms the survivors.
+import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import List
+
+# SOFn markers (C4 = DHT, C8 = JPG extension and CC = DAC are not frames)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+MAX_DIMENSION = 65500
+
+# after the first SOS, 0xFF may only be followed by 00 (stuffing), RSTn, fill bytes,
+# or the table/scan markers progressive files put between scans (DHT, SOS, DQT, DNL, DRI, COM)
+BAD_SCAN_MARKER = re.compile(rb"\xFF[^\x00\xC4\xD0-\xD7\xDA-\xDD\xFE\xFF]")
+RST_OR_SOS = re.compile(rb"\xFF([\xD0-\xD7\xDA])")
+
+# weight of each structural check in the confidence score (sums to 1.0)
+WEIGHTS = {"dqt": 0.2, "dht": 0.15, "sof": 0.25, "sos": 0.15, "entropy": 0.15, "eoi": 0.1}
+
+
+@dataclass
+class JpegCheck:
+    score: float = 0.0
+    width: int = 0
+    height: int = 0
+    reasons: List[str] = field(default_factory=list)
+
+
+def check_structure(data: bytes) -> JpegCheck:
+    """Score `data` from 0 to 1 using marker structure only (no decoding)."""
+    result = JpegCheck()
+    if not data.startswith(b"\xFF\xD8"):
+        result.reasons.append("no SOI")
+        return result
+
+    found = set()
+    pos = 2
+    n = len(data)
+    scan_start = None
+    while pos < n:
+        if data[pos] != 0xFF:
+            result.reasons.append(f"expected marker at {pos}")
+            break
+        while pos < n and data[pos] == 0xFF:
+            pos += 1  # fill bytes
+        if pos >= n:
+            break
+        marker = data[pos]
+        pos += 1
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue  # standalone marker, no length
+        if marker == 0xD9:
+            result.reasons.append("EOI before SOS")
+            break
+        if pos + 2 > n:
+            result.reasons.append("truncated segment")
+            break
+        length = struct.unpack_from(">H", data, pos)[0]
+        if length < 2 or pos + length > n:
+            result.reasons.append(f"bad segment length at {pos}")
+            break
+        if marker == 0xDB:
+            found.add("dqt")
+        elif marker == 0xC4:
+            found.add("dht")
+        elif marker in SOF_MARKERS and length >= 8:
+            _, height, width, ncomp = struct.unpack_from(">BHHB", data, pos + 2)
+            if 0 < width <= MAX_DIMENSION and 0 < height <= MAX_DIMENSION and ncomp in (1, 3, 4):
+                found.add("sof")
+                result.width, result.height = width, height
+            else:
+                result.reasons.append(f"implausible frame {width}x{height}x{ncomp}")
+        elif marker == 0xDA:
+            found.add("sos")
+            scan_start = pos + length
+            break
+        pos += length
+
+    if scan_start is not None:
+        eoi = data.rfind(b"\xFF\xD9", scan_start)
+        if eoi != -1 and eoi == n - 2:
+            found.add("eoi")
+        end = eoi if eoi != -1 else n
+        bad = BAD_SCAN_MARKER.search(data, scan_start, end)
+        if bad is None:
+            found.add("entropy")
+        else:
+            result.reasons.append(f"illegal marker in scan data at {bad.start()}")
+        # restart markers must cycle D0..D7 without gaps; each new scan starts over
+        prev = None
+        for m in RST_OR_SOS.finditer(data, scan_start, end):
+            if m.group(1) == b"\xDA":
+                prev = None
+                continue
+            cur = m.group(1)[0] - 0xD0
+            if prev is not None and cur != (prev + 1) % 8:
+                result.reasons.append("restart marker sequence broken")
+                found.discard("entropy")
+                break
+            prev = cur
+
+    for name in WEIGHTS:
+        if name not in found and name != "entropy":
+            result.reasons.append(f"missing {name.upper()}")
+    result.score = round(sum(WEIGHTS[name] for name in found), 3)
+    return result
+
+
+def partial_decode(data: bytes):
+    """Decode at reduced scale with PIL draft mode. Returns True/False, or None if PIL is not installed."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        img = Image.open(BytesIO(data))
+        img.draft("L", (max(img.width // 8, 1), max(img.height // 8, 1)))
+        img.load()
+        return True
+    except Exception:
+        return False
+
+
+def validate_jpeg(data: bytes, decode: bool = False, decode_threshold: float = 0.5) -> JpegCheck:
+    """Structural score, optionally confirmed by a partial decode.
+
+    The decode only runs for candidates already scoring `decode_threshold` or
+    more; a failed decode halves the score.
+    """
+    result = check_structure(data)
+    if decode and result.score >= decode_threshold:
+        ok = partial_decode(data)
+        if ok is False:
+            result.score = round(result.score / 2, 3)
+            result.reasons.append("partial decode failed")
+        elif ok is None:
+            result.reasons.append("PIL not installed; decode skipped")
+    return result
+
+
+def score_candidates(datas, decode: bool = False, workers: int = 4) -> List[JpegCheck]:
+    """Validate a list of candidate byte strings across a thread pool, in input order."""
+    if workers <= 1 or len(datas) < 2:
+        return [validate_jpeg(data, decode) for data in datas]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda data: validate_jpeg(data, decode), datas))
+
+
+def filter_candidates(candidates, min_score: float = 0.6, decode: bool = False, workers: int = 4):
+    """Validate (key, data) candidates in bulk.
+
+    Returns [(key, data, JpegCheck)] for candidates scoring at least
+    `min_score`, in input order.
+    """
+    candidates = list(candidates)
+    checks = score_candidates([data for _, data in candidates], decode, workers)
+    return [(key, data, chk) for (key, data), chk in zip(candidates, checks) if chk.score >= min_score]
@@ -1,54 +1,137 @@
 #!/usr/bin/env python3
 import argparse
+import os
+import sys
 from disk_parser import DiskParser
 from fat32_parser import FAT32Parser
-from signature_scanner import SignatureScanner
+from signature_scanner import is_mismatch
+from signature_verifier import verify_signatures
 from recovery import Recovery
 from reporter import generate_report
+from metrics import METRICS, profiling
+from carver import Carver
+from checkpoint import Checkpoint, ProgressLine
 
 def main():
     parser = argparse.ArgumentParser(description="FAT32 deleted-file scanner & basic recovery tool")
     parser.add_argument("image", help="Path to raw disk image (e.g., disk.img)")
     parser.add_argument("--list", action="store_true", help="List directory entries (including deleted)")
     parser.add_argument("--scan-sigs", action="store_true", help="Scan files for MP4/JPEG signatures and detect mismatches")
+    parser.add_argument("--sig-workers", type=int, default=1,
+                        help="Threads for --scan-sigs header reads (default 1; more can help on slow or network storage)")
+    parser.add_argument("--sig-stats", action="store_true",
+                        help="Also time a sequential --scan-sigs pass and print the speedup")
     parser.add_argument("--recover", metavar="ENTRY_INDEX", type=int, help="Recover file by index from list (0-based)")
     parser.add_argument("--report", metavar="OUT", default="report.csv", help="Write CSV report")
+    parser.add_argument("--no-report", action="store_true",
+                        help="Do not write the CSV report; without --list/--scan-sigs this also skips the listing, the signature pass and the pandas import")
+    parser.add_argument("--reassemble", metavar="ENTRY_INDEX", type=int,
+                        help="Recover a deleted, fragmented JPEG by index, choosing clusters by stream continuity")
+    parser.add_argument("--carve", metavar="OUT_DIR", help="Carve JPEGs from the whole data region into OUT_DIR")
+    parser.add_argument("--checkpoint", metavar="FILE", help="Checkpoint file for --carve (default: OUT_DIR/carve.ckpt.json)")
+    parser.add_argument("--checkpoint-interval", type=float, default=30.0, help="Seconds between checkpoint writes")
+    parser.add_argument("--min-score", type=float, help="Only write carved JPEGs whose validation score is at least this (0-1)")
+    parser.add_argument("--decode-check", action="store_true", help="Confirm carved JPEGs with a partial PIL decode (needs --min-score)")
+    parser.add_argument("--resume", action="store_true", help="Continue --carve from the last checkpoint")
+    parser.add_argument("--slack", action="store_true",
+                        help="Scan live files' slack and diff FAT #1 against FAT #2; findings go into the report")
+    parser.add_argument("--timeline", metavar="OUT", help="Export created/modified/accessed events to CSV in time order")
+    parser.add_argument("--between", nargs=2, metavar=("START", "END"),
+                        help="List entries whose timestamp falls in [START, END] (ISO dates or date-times)")
+    parser.add_argument("--timeline-kind", choices=("created", "modified", "accessed"), default="modified",
+                        help="Timestamp used by --between")
+    parser.add_argument("--deleted-only", action="store_true", help="Restrict --between to deleted entries")
+    parser.add_argument("--entropy-map", metavar="OUT_NPZ", help="Classify every data cluster by entropy and save the map")
+    parser.add_argument("--profile", action="store_true", help="Collect per-stage timers and counters")
+    parser.add_argument("--profile-format", choices=("json", "prom"), default="json", help="Metrics export format")
+    parser.add_argument("--profile-out", metavar="FILE", help="Write metrics here instead of stderr")
+    parser.add_argument("--cprofile", metavar="FILE", help="Dump cProfile stats for the run (implies --profile)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Record peak traced memory (implies --profile)")
     args = parser.parse_args()
+    if args.no_report:
+        if args.slack:
+            parser.error("--slack findings are written to the report; drop --no-report")
+        args.report = None
 
+    if args.profile or args.cprofile or args.tracemalloc:
+        METRICS.enable()
+        with profiling(args.cprofile, args.tracemalloc):
+            run(args)
+        text = METRICS.export(args.profile_format)
+        if args.profile_out:
+            with open(args.profile_out, "w") as f:
+                f.write(text)
+        else:
+            sys.stderr.write(text)
+    else:
+        run(args)
+
+def run(args):
     dp = DiskParser(args.image)
-    fat = FAT32Parser(dp)
-    entries = fat.scan_root_dir_recursive()
-    sigscanner = SignatureScanner()
+    with METRICS.timer("bpb"):
+        fat = FAT32Parser(dp)
+    with METRICS.timer("directory_walk"):
+        entries = fat.scan_root_dir_recursive()
     checks = {}
 
     if args.list or args.scan_sigs or args.report:
         print(f"Found {len(entries)} directory entries (this tool may include empty/non-used slots).")
-        for idx, e in enumerate(entries):
-            status = "DELETED" if e.deleted else "LIVE"
-            ext_display = f".{e.ext}" if e.ext else ""
-            print(f"[{idx}] {status}: {e.name}{ext_display} size={e.filesize} cluster={e.first_cluster}")
+        for batch in entries.batches(columns=("name", "ext", "deleted", "filesize", "first_cluster")):
+            for idx, name, ext, deleted, size, cluster in zip(range(batch["start"], len(entries)), batch["name"],
+                                                              batch["ext"], batch["deleted"], batch["filesize"],
+                                                              batch["first_cluster"]):
+                status = "DELETED" if deleted else "LIVE"
+                ext_display = f".{ext}" if ext else ""
+                print(f"[{idx}] {status}: {name}{ext_display} size={size} cluster={cluster}")
 
     if args.scan_sigs or args.report:
-        for idx, e in enumerate(entries):
-            if e.first_cluster and e.filesize:
-                try:
-                    # compute file start offset (same as in Recovery)
-                    start = fat._cluster_to_offset(e.first_cluster)
-                    data = dp.read_bytes(start, min(4096, e.filesize))
-                    sig = sigscanner.detect(data)
-                    checks[e.entry_offset] = sig
-                    # Report mismatches
-                    if sig:
-                        ext_upper = (e.ext or "").upper()
-                        if ext_upper in ("JPG", "JPEG") and sig != "JPEG":
-                            print(f"  -> signature mismatch at index {idx}: file says .{e.ext} but signature {sig}")
-                        if ext_upper in ("MP4", "M4V", "MOV") and sig != "MP4":
-                            print(f"  -> signature mismatch at index {idx}: file says .{e.ext} but signature {sig}")
-                except Exception as ex:
-                    checks[e.entry_offset] = None
+        with METRICS.timer("signature_detection"):
+            # header reads in disk order, coalesced when headers lie close together
+            checks, sig_stats = verify_signatures(dp, fat, entries, workers=args.sig_workers,
+                                                  baseline=args.sig_stats)
+        # read the entry table column-wise rather than through per-row views
+        for batch in entries.batches(columns=("entry_offset", "ext")):
+            for idx, off, ext in zip(range(batch["start"], len(entries)), batch["entry_offset"], batch["ext"]):
+                sig = checks.get(off)
+                if is_mismatch(ext, sig):
+                    print(f"  -> signature mismatch at index {idx}: file says .{ext} but signature {sig}")
+        if args.sig_stats:
+            print("Signature check:", sig_stats.summary())
+
+    slack = None
+    if args.slack:
+        from slack_scanner import SlackScanner
+        with METRICS.timer("slack_setup"):
+            slack = SlackScanner(fat, entries)
+
+    if args.carve:
+        carver = Carver(dp, fat.bpb, min_score=args.min_score, decode=args.decode_check)
+        if slack:
+            # slack tails are picked out of the carve's own reads instead of a second pass
+            carver.observers.append(slack.observe)
+        ckpt = Checkpoint(args.checkpoint or os.path.join(args.carve, "carve.ckpt.json"), args.checkpoint_interval)
+        state = ckpt.load() if args.resume else None
+        done = state["position"] - carver.data_start if state else 0
+        progress = ProgressLine(carver.data_end - carver.data_start, done=done)
+        os.makedirs(args.carve, exist_ok=True)
+        with METRICS.timer("carving"):
+            hits = carver.run(args.carve, checkpoint=ckpt, progress=progress, resume=args.resume)
+        carved = sum(1 for h in hits if h.path)
+        print(f"Carved {carved} of {len(hits)} JPEG signatures into {args.carve}")
+
+    if slack:
+        with METRICS.timer("slack"):
+            slack.scan()
+        with_data = sum(1 for f in slack.findings.values() if f.nonzero)
+        print(f"Slack: {with_data} of {len(slack.findings)} live files have non-zero slack; "
+              f"{len(slack.diff_clusters)} clusters differ between FAT copies")
+        for c in slack.diff_clusters[:20]:
+            print(f"  -> FAT mismatch at cluster {int(c)}")
 
     if args.report:
-        report_path = generate_report(entries, checks, out=args.report)
+        with METRICS.timer("report"):
+            report_path = generate_report(entries, checks, out=args.report,
+                                          extra=slack.report_columns() if slack else None)
         print("Report written to", report_path)
 
     if args.recover is not None:
@@ -61,8 +144,52 @@ def main():
             print("Cannot recover: missing cluster or size 0.")
             return
         rec = Recovery(dp)
-        out = rec.recover_by_cluster(e.first_cluster, e.filesize, fat.bpb, f"recovered_{idx}_{e.name}.{e.ext or 'bin'}")
+        with METRICS.timer("recovery"):
+            out = rec.recover_by_cluster(e.first_cluster, e.filesize, fat.bpb, f"recovered_{idx}_{e.name}.{e.ext or 'bin'}")
         print("Recovered to", out)
 
+    if args.between:
+        from timeline import TimelineIndex
+        start, end = args.between
+        with METRICS.timer("timeline_query"):
+            matches = TimelineIndex(entries).range(start, end, kind=args.timeline_kind,
+                                                   deleted=True if args.deleted_only else None)
+        print(f"{len(matches)} entries {args.timeline_kind} between {start} and {end}:")
+        for e in matches:
+            status = "DELETED" if e.deleted else "LIVE"
+            ext_display = f".{e.ext}" if e.ext else ""
+            print(f"  {getattr(e, args.timeline_kind)} {status}: {e.name}{ext_display} cluster={e.first_cluster}")
+
+    if args.timeline:
+        from timeline import export_timeline
+        with METRICS.timer("timeline_export"):
+            print("Timeline written to", export_timeline(entries, args.timeline))
+
+    emap = None
+    if args.entropy_map:
+        # numpy is only needed for this pass
+        from entropy_map import build_map
+        with METRICS.timer("entropy_map"):
+            emap = build_map(dp, fat.bpb)
+        emap.save(args.entropy_map)
+        summary = ", ".join(f"{name}={count}" for name, count in emap.counts().items())
+        print(f"Entropy map ({len(emap.classes)} clusters): {summary}; JPEG-like={int(emap.jpeg_like().sum())}")
+
+    if args.reassemble is not None:
+        idx = args.reassemble
+        if idx < 0 or idx >= len(entries) or not entries[idx].first_cluster:
+            print("Invalid index to reassemble.")
+            return
+        from reassembly import Reassembler
+        e = entries[idx]
+        with METRICS.timer("reassembly"), Reassembler(fat, emap=emap) as ra:
+            res = ra.reassemble(e.first_cluster, e.filesize or None)
+        if not res.clusters:
+            print("Cannot reassemble: no JPEG header at the entry's first cluster.")
+        else:
+            out = Recovery(dp).recover_clusters(res.clusters, len(res.data), fat.bpb, f"reassembled_{idx}_{e.name}.jpg")
+            status = "complete" if res.complete else "INCOMPLETE"
+            print(f"Reassembled {len(res.clusters)} clusters ({status}) to {out}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,149 @@
+# Per-stage timers and counters for profiling a run.
+#
+# Instrumented code checks `METRICS.enabled` before doing any work, so the
+# cost when profiling is off is a single attribute lookup per call site.
+# Updates take a lock, since thread pools (signature checks, reassembly)
+# report into the same METRICS object.
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Counters used across the code base (others may be added freely)
+COUNTERS = (
+    "bytes_read",
+    "read_calls",
+    "cache_hits",
+    "entries_decoded",
+    "signatures_matched",
+    "bytes_recovered",
+)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with self.metrics._lock:
+            t = self.metrics.timers.setdefault(self.stage, [0.0, 0])
+            t[0] += elapsed
+            t[1] += 1
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counters = {name: 0 for name in COUNTERS}
+        self.gauges = {}
+        # stage -> [total seconds, calls]
+        self.timers = {}
+
+    def enable(self, on: bool = True):
+        self.enabled = on
+
+    def incr(self, name: str, n: int = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, value):
+        if self.enabled:
+            with self._lock:
+                self.gauges[name] = value
+
+    def timer(self, stage: str):
+        """Context manager timing `stage`; a shared no-op object when disabled."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "stages": {k: {"seconds": v[0], "calls": v[1]} for k, v in self.timers.items()},
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "dfsig") -> str:
+        """Render the snapshot in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in sorted(snap["gauges"].items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        if snap["stages"]:
+            lines.append(f"# TYPE {prefix}_stage_seconds_total counter")
+            for stage, t in sorted(snap["stages"].items()):
+                lines.append(f'{prefix}_stage_seconds_total{{stage="{stage}"}} {t["seconds"]:.9f}')
+            lines.append(f"# TYPE {prefix}_stage_calls_total counter")
+            for stage, t in sorted(snap["stages"].items()):
+                lines.append(f'{prefix}_stage_calls_total{{stage="{stage}"}} {t["calls"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, fmt: str = "json") -> str:
+        if fmt == "prom":
+            return self.to_prometheus()
+        if fmt == "json":
+            return self.to_json()
+        raise ValueError(f"Unknown metrics format: {fmt}")
+
+
+METRICS = Metrics()
+
+
+@contextmanager
+def profiling(cprofile_out: str = None, trace_memory: bool = False):
+    """Optionally wrap a block in cProfile and/or tracemalloc.
+
+    cProfile stats are dumped to `cprofile_out` (load with pstats); the
+    tracemalloc peak is recorded as the `tracemalloc_peak_bytes` gauge.
+    """
+    prof = None
+    if cprofile_out:
+        import cProfile
+        prof = cProfile.Profile()
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if prof:
+        prof.enable()
+    try:
+        yield
+    finally:
+        if prof:
+            prof.disable()
+            prof.dump_stats(cprofile_out)
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            METRICS.gauge("tracemalloc_peak_bytes", peak)
@@ -0,0 +1,265 @@
+# Reassembly of fragmented JPEGs whose FAT chain has been zeroed.
+#
+# Recovery.recover_by_cluster assumes a deleted file is contiguous. Here we
+# start at the header cluster and repeatedly pick the next cluster from the
+# unallocated clusters that follow, scoring each candidate by whether the
+# JPEG stream carries on cleanly across the boundary:
+#   - restart markers must continue the RST0..RST7 cycle,
+#   - the candidate must not contain markers that are illegal in scan data,
+#   - a 0xFF at the end of the previous cluster must be completed sensibly,
+#   - with a known file size, EOI must land exactly where the size says,
+#   - its bytes should look like Huffman-coded data (high entropy); a cluster
+#     that does not is only considered if it is the very next one on disk,
+#   - for baseline JPEGs, Huffman decoding resumed from where the chain so far
+#     stopped (jpeg_scan) must run through the candidate without an error.
+# The search is bounded to a window of candidates per step, per-cluster
+# statistics are cached and computed on a thread pool, and the decode check
+# runs on the best-scoring candidates first until one passes.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+
+from fat32_parser import decode_fat
+from jpeg_scan import decode, parse_scan_spec
+from jpeg_validator import BAD_SCAN_MARKER, RST_OR_SOS
+from metrics import METRICS
+
+# bytes that may follow 0xFF inside scan data (stuffing, fill, RSTn, EOI)
+_AFTER_FF = {0x00, 0xFF, 0xD9} | set(range(0xD0, 0xD8))
+
+# Huffman-coded data is close to uniform: clusters with at least STATS_MIN_BYTES
+# of scan data are expected to reach MIN_ENTROPY bits per byte. FF 00 stuffing
+# is not required; real encoders write whole clusters without a single 0xFF.
+STATS_MIN_BYTES = 1024
+MIN_ENTROPY = 7.0
+
+
+@dataclass
+class ClusterState:
+    """What a cluster looks like as JPEG scan data; computed once per cluster."""
+    zero: bool
+    bad: bool                    # illegal marker or broken RST order inside the cluster
+    not_scan: bool               # entropy too low for Huffman-coded data
+    first_byte: int
+    ends_ff: bool
+    first_rst: Optional[int]
+    last_rst: Optional[int]
+    eoi_at: int                  # offset of FF D9, or -1
+
+
+@dataclass
+class Reassembled:
+    clusters: List[int] = field(default_factory=list)
+    data: bytes = b""
+    complete: bool = False       # True if EOI (or the expected size) was reached
+
+
+def scan_state(data: bytes, start: int = 0) -> ClusterState:
+    """Describe `data[start:]` as entropy-coded JPEG data."""
+    eoi = data.find(b"\xFF\xD9", start)
+    end = eoi if eoi != -1 else len(data)
+    bad = BAD_SCAN_MARKER.search(data, start, end) is not None
+    not_scan = False
+    if end - start >= STATS_MIN_BYTES:
+        counts = np.bincount(np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start), minlength=256)
+        p = counts[counts > 0] / (end - start)
+        not_scan = float(-(p * np.log2(p)).sum()) < MIN_ENTROPY
+    first = last = None
+    for m in RST_OR_SOS.finditer(data, start, end):
+        code = m.group(1)[0]
+        if code == 0xDA:
+            first = last = None  # new scan of a progressive JPEG restarts the cycle
+            continue
+        cur = code - 0xD0
+        if last is not None and cur != (last + 1) % 8:
+            bad = True
+        if first is None:
+            first = cur
+        last = cur
+    return ClusterState(
+        zero=not data.strip(b"\x00"),
+        bad=bad,
+        not_scan=not_scan,
+        first_byte=data[start] if len(data) > start else 0,
+        ends_ff=data.endswith(b"\xFF"),
+        first_rst=first,
+        last_rst=last,
+        eoi_at=eoi,
+    )
+
+
+class Reassembler:
+    def __init__(self, fat_parser, emap=None, window: int = 64, workers: int = 4, cache_size: int = 4096):
+        """`emap` is an optional entropy_map.EntropyMap used to favour JPEG-like clusters."""
+        self.fat = fat_parser
+        self.bpb = fat_parser.bpb
+        self.cluster_size = self.bpb.sectors_per_cluster * self.bpb.bytes_per_sector
+        self.window = window
+        self.cache_size = cache_size
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+        raw = fat_parser.read_fat(0)
+        fat = decode_fat(raw, count=len(raw) // 4)
+        total = 2 + (self.bpb.total_sectors - self.bpb.reserved_sector_count
+                     - self.bpb.num_fats * self.bpb.fat_size_32) // self.bpb.sectors_per_cluster
+        fat = fat[:total]
+        # sorted cluster numbers that the primary FAT marks free
+        self.free = np.flatnonzero(fat == 0)
+        self.free = self.free[self.free >= 2]
+        self.jpeg_like = None
+        if emap is not None:
+            self.jpeg_like = np.zeros(total, dtype=bool)
+            mask = emap.jpeg_like()
+            self.jpeg_like[emap.first_cluster:emap.first_cluster + len(mask)] = mask[:total - emap.first_cluster]
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _read(self, cluster: int) -> bytes:
+        return self.fat.dp.read_bytes(self.fat._cluster_to_offset(cluster), self.cluster_size)
+
+    def _state(self, cluster: int) -> ClusterState:
+        with self._lock:
+            st = self._cache.get(cluster)
+        if st is not None:
+            if METRICS.enabled:
+                METRICS.incr("cache_hits")
+            return st
+        st = scan_state(self._read(cluster))
+        with self._lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[cluster] = st
+        return st
+
+    def _candidates(self, current: int, used: set) -> List[int]:
+        i = int(np.searchsorted(self.free, current, side="right"))
+        out = []
+        for c in self.free[i:i + self.window + len(used)]:
+            c = int(c)
+            if c not in used:
+                out.append(c)
+                if len(out) == self.window:
+                    break
+        return out
+
+    def _score(self, cand: int, st: ClusterState, current: int, last_rst, ends_ff,
+               remaining: Optional[int]) -> Optional[float]:
+        """Continuity score of `cand` following the chain so far, or None if it cannot follow.
+
+        `remaining` is how many bytes of the file are still missing, if known.
+        """
+        if st.zero or st.bad:
+            return None
+        if st.not_scan and cand != current + 1:
+            return None
+        if ends_ff and st.first_byte not in _AFTER_FF:
+            return None
+        score = 0.0
+        if remaining is not None:
+            if remaining > self.cluster_size:
+                if st.eoi_at != -1:
+                    return None
+            elif st.eoi_at == remaining - 2 or (remaining == 1 and ends_ff and st.first_byte == 0xD9):
+                score += 3.0
+            else:
+                return None
+        first_rst = st.first_rst
+        if ends_ff and 0xD0 <= st.first_byte <= 0xD7:
+            # an RSTn marker split across the boundary comes before any inside the cluster
+            split = st.first_byte - 0xD0
+            if first_rst is not None and first_rst != (split + 1) % 8:
+                return None
+            first_rst = split
+        if last_rst is not None and first_rst is not None:
+            if first_rst != (last_rst + 1) % 8:
+                return None
+            score += 2.0
+        if cand == current + 1:
+            # the next cluster on disk stays in play even with odd statistics;
+            # the decode check in reassemble() has the last word on it
+            score += -1.0 if st.not_scan else 0.5
+        if self.jpeg_like is not None and self.jpeg_like[cand]:
+            score += 0.5
+        return score
+
+    def reassemble(self, first_cluster: int, size: Optional[int] = None, max_clusters: int = 2560) -> Reassembled:
+        """Rebuild the JPEG whose header is at `first_cluster`.
+
+        `size` (e.g. the directory entry's filesize) bounds the chain length;
+        without it the chain ends at the first EOI or after `max_clusters`.
+        """
+        head = self._read(first_cluster)
+        if not head.startswith(b"\xFF\xD8\xFF"):
+            return Reassembled()
+        sos = head.find(b"\xFF\xDA")
+        state = scan_state(head, sos + 2 if sos != -1 else len(head))
+        # decoder state at the end of the chain so far; None for progressive
+        # or unparsable headers, which fall back to the structural checks only
+        spec = parse_scan_spec(head)
+        decoded = decode(spec, head[spec.scan_start:]) if spec else None
+        limit = -(-size // self.cluster_size) if size else max_clusters
+
+        chain = [first_cluster]
+        parts = [head]
+        used = {first_cluster}
+        last_rst, ends_ff = state.last_rst, state.ends_ff
+        complete = state.eoi_at != -1 and sos != -1
+        while not complete and len(chain) < limit:
+            current = chain[-1]
+            remaining = size - len(chain) * self.cluster_size if size else None
+            cands = self._candidates(current, used)
+            if not cands:
+                break
+            states = list(self.pool.map(self._state, cands))
+            ranked = []
+            for i, (cand, st) in enumerate(zip(cands, states)):
+                score = self._score(cand, st, current, last_rst, ends_ff, remaining)
+                if score is not None:
+                    # candidates are in disk order, so ties go to the nearest cluster
+                    ranked.append((score, -i, cand, st))
+            ranked.sort(reverse=True)
+            best = None
+            for _, _, cand, st in ranked:
+                data = self._read(cand)
+                if decoded is not None:
+                    after = decode(spec, data, decoded)
+                    if after is None:
+                        continue  # the Huffman stream breaks inside this cluster
+                    decoded = after
+                best = (cand, st, data)
+                break
+            if best is None:
+                break
+            cand, st, data = best
+            chain.append(cand)
+            used.add(cand)
+            parts.append(data)
+            if st.last_rst is not None:
+                last_rst = st.last_rst
+            elif ends_ff and 0xD0 <= st.first_byte <= 0xD7:
+                last_rst = st.first_byte - 0xD0
+            complete = st.eoi_at != -1 or (ends_ff and st.first_byte == 0xD9)
+            ends_ff = st.ends_ff
+
+        data = b"".join(parts)
+        if size:
+            data = data[:size]
+            complete = complete or len(chain) == limit
+        else:
+            eoi = data.find(b"\xFF\xD9", max(len(data) - len(parts[-1]) - 1, 0))
+            if eoi != -1:
+                data = data[:eoi + 2]
+        return Reassembled(clusters=chain, data=data, complete=complete)
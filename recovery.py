@@ -1,9 +1,11 @@
 import os
+from metrics import METRICS
 
 class Recovery:
-    def __init__(self, disk_parser):
+    def __init__(self, disk_parser, out_dir: str = 'recovered'):
         self.dp = disk_parser
-        os.makedirs('recovered', exist_ok=True)
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
 
     def recover_by_cluster(self, start_cluster: int, size: int, bpb, out_name: str) -> str:
         """Recover contiguous data starting at start_cluster reading `size` bytes.
@@ -14,7 +16,27 @@ class Recovery:
         data_region_sector = bpb.reserved_sector_count + (bpb.num_fats * bpb.fat_size_32)
         offset = (data_region_sector + (start_cluster - 2) * bpb.sectors_per_cluster) * bpb.bytes_per_sector
         data = self.dp.read_bytes(offset, size)
-        out_path = os.path.join('recovered', out_name)
+        out_path = os.path.join(self.out_dir, out_name)
         with open(out_path, 'wb') as f:
             f.write(data)
+        if METRICS.enabled:
+            METRICS.incr("bytes_recovered", len(data))
+        return os.path.abspath(out_path)
+
+    def recover_clusters(self, clusters, size: int, bpb, out_name: str) -> str:
+        """Recover `size` bytes gathered from an explicit cluster list (e.g. a reassembled fragment chain)."""
+        if not clusters:
+            raise ValueError("No clusters given; cannot recover.")
+        cluster_size = bpb.sectors_per_cluster * bpb.bytes_per_sector
+        data_region_sector = bpb.reserved_sector_count + (bpb.num_fats * bpb.fat_size_32)
+        parts = []
+        for c in clusters:
+            offset = (data_region_sector + (c - 2) * bpb.sectors_per_cluster) * bpb.bytes_per_sector
+            parts.append(self.dp.read_bytes(offset, cluster_size))
+        data = b"".join(parts)[:size]
+        out_path = os.path.join(self.out_dir, out_name)
+        with open(out_path, 'wb') as f:
+            f.write(data)
+        if METRICS.enabled:
+            METRICS.incr("bytes_recovered", len(data))
         return os.path.abspath(out_path)
@@ -1,35 +1,102 @@
+import csv
 import os
-try:
-    import pandas as pd
-except Exception:
-    pd = None
+from metrics import METRICS
 
-def generate_report(entries, checks, out='report.csv'):
+_pd = None
+
+def _pandas():
+    """Import pandas on first use (it costs ~300 ms); returns None if not installed."""
+    global _pd
+    if _pd is None:
+        try:
+            import pandas
+            _pd = pandas
+        except Exception:
+            _pd = False
+    return _pd or None
+
+HEADERS = ["name", "deleted", "first_cluster", "filesize", "signature"]
+BATCH_HEADERS = ["image_id"] + HEADERS + ["error"]
+
+def generate_report(entries, checks, out='report.csv', extra=None):
     """Generate a CSV report of scanned entries and signature checks.
 
-    entries: iterable of DirEntry
+    entries: EntryTable (read column-wise) or a re-iterable of rows with the same attributes
     checks: dict mapping entry.entry_offset -> signature string or None
+    extra: optional dict mapping entry.entry_offset -> {column: value} for
+           additional columns (e.g. SlackScanner.report_columns())
+    """
+    headers = HEADERS
+    with METRICS.timer("report_rows"):
+        columns = _build_columns(entries, checks)
+        if extra:
+            names = []
+            for values in extra.values():
+                names.extend(k for k in values if k not in names)
+            headers = HEADERS + names
+            offsets = entries.entry_offset if hasattr(entries, "batches") else [e.entry_offset for e in entries]
+            found = [extra.get(off, {}) for off in offsets]
+            for k in names:
+                columns[k] = [values.get(k, "") for values in found]
+    with METRICS.timer("report_write"):
+        _write_csv(columns, out, headers)
+    return os.path.abspath(out)
+
+
+def generate_batch_report(results, out='batch_report.csv'):
+    """Write one consolidated CSV for a batch run, with an image_id column.
+
+    results: iterable of dicts with image_id, entries, checks and error keys
+    (as returned by batch.scan_image). A failed image gets a single row
+    carrying its error message.
     """
-    rows = []
+    columns = {h: [] for h in BATCH_HEADERS}
+    for res in results:
+        if res.get("error"):
+            for h in HEADERS:
+                columns[h].append("")
+            columns["image_id"].append(res["image_id"])
+            columns["error"].append(res["error"])
+            continue
+        image = _build_columns(res["entries"], res["checks"])
+        n = len(image["name"])
+        for h in HEADERS:
+            columns[h] += image[h]
+        columns["image_id"] += [res["image_id"]] * n
+        columns["error"] += [""] * n
+    _write_csv(columns, out, BATCH_HEADERS)
+    return os.path.abspath(out)
+
+
+def _build_columns(entries, checks):
+    """Report values as {header: list}; an EntryTable is read column-wise, without per-row dicts."""
+    if hasattr(entries, "batches"):
+        get = checks.get
+        return {
+            "name": entries.display_names(),
+            "deleted": list(map(bool, entries.deleted)),
+            "first_cluster": entries.first_cluster.tolist(),
+            "filesize": entries.filesize.tolist(),
+            "signature": [sig or "" for sig in map(get, entries.entry_offset)],
+        }
+    columns = {h: [] for h in HEADERS}
     for e in entries:
-        sig = checks.get(e.entry_offset)
-        display_name = f"{e.name}.{e.ext}" if e.ext else e.name
-        rows.append({
-            "name": display_name,
-            "deleted": bool(e.deleted),
-            "first_cluster": int(e.first_cluster),
-            "filesize": int(e.filesize),
-            "signature": sig or ""
-        })
+        columns["name"].append(f"{e.name}.{e.ext}" if e.ext else e.name)
+        columns["deleted"].append(bool(e.deleted))
+        columns["first_cluster"].append(int(e.first_cluster))
+        columns["filesize"].append(int(e.filesize))
+        columns["signature"].append(checks.get(e.entry_offset) or "")
+    return columns
+
+
+def _write_csv(columns, out, headers):
+    pd = _pandas()
     if pd:
-        df = pd.DataFrame(rows)
+        df = pd.DataFrame(columns, columns=headers)
         df.to_csv(out, index=False)
     else:
-        # Fallback to manual CSV if pandas not installed
+        # Fallback to the csv module if pandas not installed (quotes commas in names/errors)
         with open(out, 'w', newline='') as f:
-            headers = ["name","deleted","first_cluster","filesize","signature"]
-            f.write(",".join(headers) + "\n")
-            for r in rows:
-                line = f"{r['name']},{int(r['deleted'])},{r['first_cluster']},{r['filesize']},{r['signature']}\n"
-                f.write(line)
-    return os.path.abspath(out)
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(headers)
+            writer.writerows(zip(*([int(v) if isinstance(v, bool) else v for v in columns[h]] for h in headers)))
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# Long-running query service over one image.
+#
+# The image is parsed once: directory entries, header signatures and file
+# extents are loaded into in-memory indexes, and every request reads from a
+# single shared mmap (MappedDiskParser). Queries are answered from the indexes
+# without touching the image; /recover streams the extent bytes straight from
+# the map.
+#
+#   python serve.py disk.img --port 8765
+#   curl 'localhost:8765/entries?format=JPEG&deleted=1&name=*.mp4'
+#   curl 'localhost:8765/stats?group=format'
+#   curl -o f.jpg 'localhost:8765/recover/12'
+import argparse
+import bisect
+import fnmatch
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from disk_parser import MappedDiskParser
+from fat32_parser import FAT32Parser
+from metrics import METRICS
+from signature_scanner import is_mismatch
+from signature_verifier import verify_signatures
+
+GROUPS = ("format", "ext", "deleted", "mismatch")
+STREAM_CHUNK = 1 << 20
+
+
+class ScanIndex:
+    """Entries, signatures and extents of one image, indexed for filtering."""
+
+    def __init__(self, dp: MappedDiskParser):
+        self.dp = dp
+        self.fat = FAT32Parser(dp)
+        bpb = self.fat.bpb
+        self.cluster_size = bpb.sectors_per_cluster * bpb.bytes_per_sector
+        with METRICS.timer("directory_walk"):
+            self.entries = self.fat.scan_root_dir_recursive()
+        table = self.fat.fat_table()
+
+        self.signatures: List[Optional[str]] = []
+        self.extents: List[List[Tuple[int, int]]] = []   # per entry: [(image offset, length)]
+        self.by_format: Dict[str, set] = {}
+        self.by_ext: Dict[str, set] = {}
+        self.deleted = set()
+        self.mismatch = set()
+        runs = []                                        # (first cluster, last cluster, entry index)
+        columns = ("ext", "deleted", "first_cluster", "filesize", "entry_offset")
+        with METRICS.timer("signature_detection"):
+            checks = verify_signatures(dp, self.fat, self.entries)[0]
+            for batch in self.entries.batches(columns=columns):
+                rows = zip(range(batch["start"], len(self.entries)), *(batch[c] for c in columns))
+                for i, ext, deleted, first_cluster, filesize, entry_offset in rows:
+                    sig = checks.get(entry_offset)
+                    extents = []
+                    if first_cluster and filesize:
+                        for first, last in self._cluster_runs(first_cluster, filesize, deleted, table):
+                            runs.append((first, last, i))
+                            extents.append((self.fat._cluster_to_offset(first), (last - first + 1) * self.cluster_size))
+                        extents = self._trim(extents, filesize, dp.size)
+                    self.signatures.append(sig)
+                    self.extents.append(extents)
+                    self.by_format.setdefault(sig or "", set()).add(i)
+                    self.by_ext.setdefault((ext or "").upper(), set()).add(i)
+                    if deleted:
+                        self.deleted.add(i)
+                    if is_mismatch(ext, sig):
+                        self.mismatch.add(i)
+        runs.sort()
+        self._run_starts = [r[0] for r in runs]
+        self._runs = runs
+        self._max_run = max((last - first for first, last, _ in runs), default=0)
+        self._names = [name.lower() for name in self.entries.display_names()]
+
+    def _cluster_runs(self, first_cluster, filesize, deleted, table):
+        """Runs of consecutive clusters holding the entry's data.
+
+        Live files follow their FAT chain; deleted ones are assumed contiguous,
+        as in Recovery.recover_by_cluster.
+        """
+        n = -(-filesize // self.cluster_size)
+        chain = [] if deleted else self.fat.cluster_chain(first_cluster, table, limit=n)
+        if len(chain) < n:
+            return [(first_cluster, first_cluster + n - 1)]
+        out = []
+        for c in chain:
+            if out and c == out[-1][1] + 1:
+                out[-1][1] = c
+            else:
+                out.append([c, c])
+        return [tuple(r) for r in out]
+
+    @staticmethod
+    def _trim(extents, size, image_size):
+        """Cut extents to the file size and to the end of the image.
+
+        Deleted entries can carry any filesize; an extent past the image end
+        would make /recover promise bytes it cannot send.
+        """
+        out = []
+        for off, length in extents:
+            length = min(length, size, image_size - off)
+            if length <= 0:
+                break
+            out.append((off, length))
+            size -= length
+        return out
+
+    @staticmethod
+    def display_name(e) -> str:
+        return f"{e.name}.{e.ext}" if e.ext else e.name
+
+    def in_clusters(self, lo: int, hi: int) -> set:
+        """Entries with at least one cluster in [lo, hi]."""
+        i = bisect.bisect_left(self._run_starts, lo - self._max_run)
+        j = bisect.bisect_right(self._run_starts, hi)
+        return {idx for first, last, idx in self._runs[i:j] if last >= lo}
+
+    def query(self, format=None, ext=None, deleted=None, mismatch=None,
+              cluster_min=None, cluster_max=None, name=None) -> List[int]:
+        """Entry indexes matching every given filter, in directory order.
+
+        `name` is a case-insensitive glob on 'NAME.EXT'; the cluster bounds
+        match entries overlapping that range.
+        """
+        sets = []
+        if format is not None:
+            sets.append(self.by_format.get(format.upper() if format else "", set()))
+        if ext is not None:
+            sets.append(self.by_ext.get(ext.upper(), set()))
+        if mismatch is not None:
+            sets.append(self.mismatch if mismatch else set(range(len(self.entries))) - self.mismatch)
+        if deleted is not None:
+            sets.append(self.deleted if deleted else set(range(len(self.entries))) - self.deleted)
+        if cluster_min is not None or cluster_max is not None:
+            sets.append(self.in_clusters(cluster_min or 0, cluster_max if cluster_max is not None else 0x0FFFFFFF))
+        if sets:
+            sets.sort(key=len)
+            hits = set(sets[0]).intersection(*sets[1:])
+        else:
+            hits = range(len(self.entries))
+        if name:
+            pattern = name.lower()
+            hits = [i for i in hits if fnmatch.fnmatchcase(self._names[i], pattern)]
+        return sorted(hits)
+
+    def aggregate(self, indexes, group: str) -> Dict[str, dict]:
+        """Count and total size of `indexes` grouped by format, ext, deleted or mismatch."""
+        if group not in GROUPS:
+            raise ValueError(f"Unknown group: {group}")
+        out: Dict[str, dict] = {}
+        t = self.entries   # read the columns directly rather than building rows
+        exts = t.exts.strings
+        for i in indexes:
+            if group == "format":
+                key = self.signatures[i] or ""
+            elif group == "ext":
+                key = (exts[t.ext[i]] or "").upper()
+            elif group == "deleted":
+                key = str(bool(t.deleted[i])).lower()
+            else:
+                key = str(i in self.mismatch).lower()
+            bucket = out.setdefault(key, {"count": 0, "bytes": 0})
+            bucket["count"] += 1
+            bucket["bytes"] += int(t.filesize[i])
+        return out
+
+    def describe(self, i: int) -> dict:
+        e = self.entries[i]
+        return {
+            "index": i,
+            "name": self.display_name(e),
+            "deleted": bool(e.deleted),
+            "first_cluster": int(e.first_cluster),
+            "filesize": int(e.filesize),
+            "signature": self.signatures[i] or "",
+            "mismatch": i in self.mismatch,
+            "modified": e.modified.isoformat(sep=" ") if e.modified else None,
+            "extents": self.extents[i],
+        }
+
+    def stream(self, i: int, chunk: int = STREAM_CHUNK):
+        """Yield the entry's data in chunks straight from the shared map."""
+        for off, length in self.extents[i]:
+            for pos in range(off, off + length, chunk):
+                with self.dp.view(pos, min(chunk, off + length - pos)) as view:
+                    yield view
+        if METRICS.enabled:
+            METRICS.incr("bytes_recovered", sum(length for _, length in self.extents[i]))
+
+
+def _flag(value: Optional[str]) -> Optional[bool]:
+    if value is None:
+        return None
+    return value.lower() in ("1", "true", "yes")
+
+
+def _attachment_name(name: str) -> str:
+    """Filename safe to put in a quoted Content-Disposition value."""
+    safe = "".join(c if " " <= c <= "~" and c not in '"\\' else "_" for c in name)
+    return safe or "recovered.bin"
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    return int(value, 0) if value is not None else None
+
+
+class Handler(BaseHTTPRequestHandler):
+    index: ScanIndex = None   # set by make_server
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _json(self, payload, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _filtered(self, params):
+        get = lambda key: params.get(key, [None])[0]
+        return self.index.query(
+            format=get("format"), ext=get("ext"),
+            deleted=_flag(get("deleted")), mismatch=_flag(get("mismatch")),
+            cluster_min=_int(get("cluster_min")), cluster_max=_int(get("cluster_max")),
+            name=get("name"),
+        )
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        t0 = time.perf_counter()
+        try:
+            if parts == ["entries"]:
+                hits = self._filtered(params)
+                offset = int(params.get("offset", ["0"])[0])
+                limit = int(params.get("limit", ["1000"])[0])
+                self._json({"total": len(hits), "offset": offset,
+                            "entries": [self.index.describe(i) for i in hits[offset:offset + limit]],
+                            "ms": round((time.perf_counter() - t0) * 1000, 3)})
+            elif parts == ["stats"]:
+                group = params.get("group", ["format"])[0]
+                hits = self._filtered(params)
+                self._json({"total": len(hits), "group": group, "groups": self.index.aggregate(hits, group),
+                            "ms": round((time.perf_counter() - t0) * 1000, 3)})
+            elif len(parts) == 2 and parts[0] == "entries":
+                self._json(self.index.describe(self._entry(parts[1])))
+            elif len(parts) == 2 and parts[0] == "recover":
+                self._recover(self._entry(parts[1]))
+            elif parts == ["metrics"]:
+                self._json(METRICS.snapshot())
+            else:
+                self._json({"error": "not found"}, 404)
+        except (ValueError, KeyError) as ex:
+            self._json({"error": str(ex)}, 400)
+        except IndexError:
+            self._json({"error": "no such entry"}, 404)
+
+    def _entry(self, text: str) -> int:
+        i = int(text)
+        if not 0 <= i < len(self.index.entries):
+            raise IndexError(i)
+        return i
+
+    def _recover(self, i: int):
+        e = self.index.entries[i]
+        if not self.index.extents[i]:
+            raise ValueError("entry has no data")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(sum(length for _, length in self.index.extents[i])))
+        self.send_header("Content-Disposition", f'attachment; filename="{_attachment_name(self.index.display_name(e))}"')
+        self.end_headers()
+        for chunk in self.index.stream(i):
+            self.wfile.write(chunk)
+
+
+def make_server(index: ScanIndex, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    handler = type("BoundHandler", (Handler,), {"index": index})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve filter/aggregate queries and recoveries for one image")
+    parser.add_argument("image", help="Path to FAT32 disk image")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with MappedDiskParser(args.image) as dp:
+        t0 = time.perf_counter()
+        index = ScanIndex(dp)
+        print(f"Indexed {len(index.entries)} entries in {time.perf_counter() - t0:.2f}s")
+        server = make_server(index, args.host, args.port)
+        print(f"Serving on http://{args.host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 # Signature scanner for JPEG and MP4 (ftyp) patterns.
 
+from metrics import METRICS
+
 MP4_SIGS = [
     bytes.fromhex('0000001866747970'),        # common MP4 ftyp header (32-bit size + 'ftyp')
     bytes.fromhex('000000146674797069736f6d')  # smaller variant with 'isom' brand
 ]
 JPEG_SIG = bytes.fromhex('FFD8FF')
+# signature each extension should carry
+EXPECTED_SIG = {'JPG': 'JPEG', 'JPEG': 'JPEG', 'MP4': 'MP4', 'M4V': 'MP4', 'MOV': 'MP4'}
+
+def is_mismatch(ext: str, sig) -> bool:
+    """True if a detected signature contradicts the file extension."""
+    expected = EXPECTED_SIG.get((ext or '').upper())
+    return bool(sig) and expected is not None and sig != expected
 
 class SignatureScanner:
     def __init__(self):
@@ -12,6 +21,12 @@ class SignatureScanner:
 
     def detect(self, data: bytes):
         """Return a short signature label ('JPEG'|'MP4') or None."""
+        sig = self._match(data)
+        if sig and METRICS.enabled:
+            METRICS.incr("signatures_matched")
+        return sig
+
+    def _match(self, data: bytes):
         if not data:
             return None
         if data.startswith(JPEG_SIG):
@@ -0,0 +1,132 @@
+# File-slack and FAT-copy mismatch scanning.
+#
+# File slack is the tail of a file's last cluster past EOF; FAT #1 and FAT #2
+# should be identical. Both often keep remnants of deleted data. Slack is read
+# tail-only from each live file's extent, either piggy-backing on the carver's
+# streaming read (Carver.observers) or with small direct reads when no carve
+# is running.
+import bisect
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from carver import JPEG_SOI
+from fat32_parser import decode_fat
+from signature_scanner import MP4_SIGS
+
+
+@dataclass
+class SlackFinding:
+    entry_offset: int
+    cluster: int
+    offset: int                  # absolute image offset of the slack tail
+    length: int
+    nonzero: int = 0
+    signature: str = ""          # 'JPEG' / 'MP4' if a header shows up inside the slack
+    fat_mismatch: bool = False   # some cluster of the file's chain differs between FAT copies
+
+
+def read_fats(fat_parser):
+    """FAT #1 as a cluster table, and the clusters whose FAT #1 and FAT #2 entries differ.
+
+    Both copies come from one read of the FAT area; the table is what
+    FAT32Parser.fat_table() returns, so it can go straight to cluster_chain.
+    """
+    bpb = fat_parser.bpb
+    fat_bytes = bpb.fat_size_32 * bpb.bytes_per_sector
+    copies = min(bpb.num_fats, 2)
+    raw = fat_parser.dp.read_bytes(bpb.reserved_sector_count * bpb.bytes_per_sector, copies * fat_bytes)
+    fat1 = decode_fat(raw, count=min(fat_bytes, len(raw)) // 4)
+    table = array("I", fat1.astype("=u4").tobytes())
+    if copies < 2:
+        return table, np.empty(0, dtype=np.int64)
+    n = max(min(fat_bytes, len(raw) - fat_bytes), 0) // 4
+    return table, np.flatnonzero(fat1[:n] != decode_fat(raw, fat_bytes, n))
+
+
+def fat_diff(fat_parser) -> np.ndarray:
+    """Cluster numbers whose FAT #1 and FAT #2 entries differ (one read of the FAT area)."""
+    return read_fats(fat_parser)[1]
+
+
+def _signature_in(data: bytes) -> str:
+    if JPEG_SOI in data:
+        return "JPEG"
+    # MP4 headers start with a 4-byte box size, so match on the 'ftyp' part
+    if any(sig[4:] in data for sig in MP4_SIGS):
+        return "MP4"
+    return ""
+
+
+class SlackScanner:
+    def __init__(self, fat_parser, entries):
+        self.fat = fat_parser
+        self.cluster_size = fat_parser.bpb.sectors_per_cluster * fat_parser.bpb.bytes_per_sector
+        table, self.diff_clusters = read_fats(fat_parser)
+        diff = set(self.diff_clusters.tolist())
+
+        self.findings: Dict[int, SlackFinding] = {}
+        for batch in entries.batches(columns=("deleted", "first_cluster", "filesize", "entry_offset")):
+            for deleted, first_cluster, filesize, entry_offset in zip(batch["deleted"], batch["first_cluster"],
+                                                                     batch["filesize"], batch["entry_offset"]):
+                if deleted or not first_cluster or not filesize:
+                    continue
+                n = -(-filesize // self.cluster_size)
+                chain = fat_parser.cluster_chain(first_cluster, table, limit=n)
+                used = filesize % self.cluster_size
+                finding = SlackFinding(entry_offset, chain[-1] if chain else 0, 0, 0,
+                                       fat_mismatch=any(c in diff for c in chain))
+                if len(chain) == n and used:
+                    finding.offset = fat_parser._cluster_to_offset(chain[-1]) + used
+                    finding.length = self.cluster_size - used
+                self.findings[entry_offset] = finding
+
+        # slack ranges sorted by offset, for matching against streamed chunks
+        self._pending = sorted((f for f in self.findings.values() if f.length), key=lambda f: f.offset)
+        self._starts = [f.offset for f in self._pending]
+        self._parts: Dict[int, List[bytes]] = {}
+        self._done = set()
+
+    def _record(self, finding: SlackFinding, data: bytes):
+        finding.nonzero = len(data) - data.count(0)
+        finding.signature = _signature_in(data)
+        self._done.add(finding.entry_offset)
+
+    def observe(self, pos: int, data: bytes):
+        """Carver observer: pick slack tails out of a chunk streamed from `pos`."""
+        end = pos + len(data)
+        # first range that could overlap this chunk (ranges are at most one cluster long)
+        i = bisect.bisect_left(self._starts, pos - self.cluster_size)
+        while i < len(self._pending) and self._pending[i].offset < end:
+            f = self._pending[i]
+            lo, hi = max(f.offset, pos), min(f.offset + f.length, end)
+            if lo < hi:
+                self._parts.setdefault(f.entry_offset, []).append(data[lo - pos:hi - pos])
+                if hi == f.offset + f.length:
+                    self._record(f, b"".join(self._parts.pop(f.entry_offset)))
+            i += 1
+
+    def scan(self):
+        """Read directly any slack tails that `observe` has not seen in full.
+
+        After a streamed carve this only covers ranges the carve skipped
+        (e.g. before a resume point); without a carve it reads every tail.
+        """
+        for f in self._pending:
+            if f.entry_offset not in self._done:
+                self._parts.pop(f.entry_offset, None)
+                self._record(f, self.fat.dp.read_bytes(f.offset, f.length))
+
+    def report_columns(self) -> Dict[int, dict]:
+        """Per-entry extra columns for reporter.generate_report."""
+        return {
+            off: {
+                "slack_bytes": f.length,
+                "slack_nonzero": f.nonzero,
+                "slack_signature": f.signature,
+                "fat_mismatch": f.fat_mismatch,
+            }
+            for off, f in self.findings.items()
+        }
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# Startup-time budget check for the CLI entry points.
+#
+# Runs each command in a fresh interpreter with `-X importtime`, reports the
+# slowest imports, fails if a heavy dependency (pandas, numpy, PIL) is loaded
+# where it should not be, and fails if startup overhead exceeds the budget.
+# Intended for CI:  python startup_check.py --budget-ms 150
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HEAVY = ("pandas", "numpy", "PIL")
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (label, argv after the interpreter) - none of these should need heavy deps
+COMMANDS = [
+    ("import main", ["-c", "import main"]),
+    ("main.py --help", ["main.py", "--help"]),
+    ("batch.py --help", ["batch.py", "--help"]),
+]
+
+
+def _run(argv):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable] + argv, cwd=HERE, capture_output=True, text=True)
+    return time.perf_counter() - start, proc
+
+
+def importtime(argv):
+    """Return [(module, self_us, cumulative_us)] parsed from `-X importtime` output."""
+    _, proc = _run(["-X", "importtime"] + argv)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|")
+            rows.append((name.strip(), int(self_us), int(cum_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def best_wall(argv, repeat):
+    return min(_run(argv)[0] for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI startup time and lazy imports")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Allowed startup overhead over a bare interpreter")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command; the fastest is used")
+    parser.add_argument("--top", type=int, default=10, help="How many slow imports to show per command")
+    args = parser.parse_args()
+
+    baseline = best_wall(["-c", "pass"], args.repeat)
+    print(f"bare interpreter: {baseline * 1000:.1f} ms")
+    failed = False
+
+    for label, argv in COMMANDS:
+        rows = importtime(argv)
+        heavy = sorted({name.split(".")[0] for name, _, _ in rows if name.split(".")[0] in HEAVY})
+        overhead = (best_wall(argv, args.repeat) - baseline) * 1000
+        status = "ok"
+        if heavy:
+            status = f"FAIL (imports {', '.join(heavy)})"
+            failed = True
+        elif overhead > args.budget_ms:
+            status = f"FAIL (over {args.budget_ms:.0f} ms budget)"
+            failed = True
+        print(f"\n{label}: +{overhead:.1f} ms  {status}")
+        # only top-level imports, so cumulative times are not double counted
+        top = sorted((r for r in rows if "." not in r[0]), key=lambda r: r[2], reverse=True)[:args.top]
+        for name, _, cum_us in top:
+            print(f"  {cum_us / 1000:8.1f} ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
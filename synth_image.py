@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# Synthetic FAT32 image generator used by the benchmark harness.
+#
+# Unlike disk_img.py (one JPEG at a fixed offset, no BPB), this writes a real
+# BPB, two FAT copies, a root directory and file data, so every stage of the
+# tool (BPB parse, directory walk, signature checks, carving, recovery) has
+# something to chew on. The ground truth is returned as a manifest dict.
+import argparse
+import json
+import os
+import random
+import struct
+from dataclasses import dataclass, asdict, field
+from itertools import accumulate
+from typing import List
+
+BYTES_PER_SECTOR = 512
+RESERVED_SECTORS = 32
+NUM_FATS = 2
+ROOT_CLUSTER = 2
+# FAT32Parser.scan_root_dir_recursive reads this many clusters from the root
+ROOT_DIR_CLUSTERS = 64
+
+FAT_EOC = 0x0FFFFFFF
+FAT_MEDIA = 0x0FFFFFF8
+
+JPEG_EXTS = ("JPG", "JPEG")
+MP4_EXTS = ("MP4", "M4V", "MOV")
+# extensions used when a file is deliberately mislabeled
+WRONG_EXT = {"JPEG": ("TXT", "DAT", "MP4"), "MP4": ("JPG", "TXT", "BIN"), "TEXT": ("JPG", "MP4")}
+
+# Standard luminance Huffman tables (ITU T.81 Annex K.3)
+_DC_COUNTS = bytes([0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0])
+_DC_SYMBOLS = bytes(range(12))
+_AC_COUNTS = bytes([0, 2, 1, 3, 3, 2, 4, 3, 5, 5, 4, 4, 0, 0, 1, 0x7D])
+_AC_SYMBOLS = bytes.fromhex(
+    "01020300041105122131410613516107227114328191a1082342b1c11552d1f0"
+    "2433627282090a161718191a25262728292a3435363738393a434445464748494a"
+    "535455565758595a636465666768696a737475767778797a838485868788898a"
+    "92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6"
+    "c7c8c9cad2d3d4d5d6d7d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9fa"
+)
+
+
+def _huffman_codes(counts: bytes, symbols: bytes) -> dict:
+    """symbol -> code as a '0'/'1' string (canonical JPEG code assignment)."""
+    codes = {}
+    code = k = 0
+    for length, count in enumerate(counts, 1):
+        for _ in range(count):
+            codes[symbols[k]] = format(code, f"0{length}b")
+            code += 1
+            k += 1
+        code <<= 1
+    return codes
+
+
+_DC_CODES = _huffman_codes(_DC_COUNTS, _DC_SYMBOLS)
+_AC_CODES = _huffman_codes(_AC_COUNTS, _AC_SYMBOLS)
+# DC sizes are capped at 5 so the DC predictor's random walk stays in range
+_DC_SMALL = list(range(6))
+_DC_WEIGHTS = list(accumulate(2.0 ** -len(_DC_CODES[size]) for size in _DC_SMALL))
+_AC_LIST = list(_AC_CODES)
+_AC_WEIGHTS = list(accumulate(2.0 ** -len(_AC_CODES[symbol]) for symbol in _AC_LIST))
+
+@dataclass
+class SynthConfig:
+    size: int = 64 * 1024 * 1024
+    cluster_size: int = 4096
+    num_files: int = 200
+    deleted_ratio: float = 0.3
+    fragmentation: float = 0.0
+    mislabeled_ratio: float = 0.1
+    orphans: int = 5
+    min_file_size: int = 4 * 1024
+    max_file_size: int = 256 * 1024
+    restart_interval: int = 32          # MCUs between RSTn markers in JPEG scan data (0 = none)
+    gap_fill: str = "zero"             # what fills the gaps between fragments: zero, text or random
+    jpeg_sources: List[str] = field(default_factory=list)   # real JPEG files used in turn instead of generated ones
+    seed: int = 0
+
+
+def _segment(marker: int, payload: bytes) -> bytes:
+    return struct.pack(">HH", 0xFF00 | marker, len(payload) + 2) + payload
+
+
+def _random_block(rng: random.Random) -> str:
+    """Huffman-coded bits of one 8x8 block with random coefficients.
+
+    Symbols are drawn with probability 2^-(code length), the distribution
+    the code is optimal for, so the coded bits look uniformly random like
+    real scan data (byte entropy near 8, FF 00 stuffing about once per
+    256 bytes).
+    """
+    size = rng.choices(_DC_SMALL, cum_weights=_DC_WEIGHTS)[0]
+    out = [_DC_CODES[size], format(rng.getrandbits(size), f"0{size}b") if size else ""]
+    k = 0
+    while k < 63:
+        symbol = rng.choices(_AC_LIST, cum_weights=_AC_WEIGHTS)[0]
+        run, size = symbol >> 4, symbol & 0x0F
+        if symbol == 0x00 or k + run + 1 > 63:
+            out.append(_AC_CODES[0x00])  # EOB
+            break
+        k += run + 1
+        out += [_AC_CODES[symbol], format(rng.getrandbits(size), f"0{size}b") if size else ""]
+    return "".join(out)
+
+
+def make_jpeg(rng: random.Random, size: int, restart_interval: int = 32) -> bytes:
+    """Build a decodable baseline greyscale JPEG of at least `size` bytes.
+
+    Scan data is real Huffman-coded blocks (standard tables, random
+    coefficients) with byte stuffing, and an RSTn marker every
+    `restart_interval` MCUs (0 = none), so decoders accept it and the only
+    FF D9 in the stream is the real EOI. The image grows one MCU row at a
+    time, so the result overshoots `size` by less than one row.
+    """
+    pool = [_random_block(rng) for _ in range(256)]
+    cols = rng.randrange(8, 129)
+    head_len = 2 + 18 + 69 + 13 + 33 + 183 + (6 if restart_interval else 0) + 10
+
+    body = bytearray()
+    bits = []
+    pending = 0      # bits not yet flushed to `body`
+    mcus = rows = rst = 0
+
+    def flush():
+        nonlocal pending
+        s = "".join(bits)
+        s += "1" * (-len(s) % 8)  # pad with 1-bits up to a byte boundary
+        if s:
+            body.extend(int(s, 2).to_bytes(len(s) // 8, "big").replace(b"\xFF", b"\xFF\x00"))
+        bits.clear()
+        pending = 0
+
+    while True:
+        for block in rng.choices(pool, k=cols):
+            if restart_interval and mcus and mcus % restart_interval == 0:
+                flush()
+                body += bytes([0xFF, 0xD0 + rst])
+                rst = (rst + 1) % 8
+            bits.append(block)
+            pending += len(block)
+            mcus += 1
+        rows += 1
+        if head_len + len(body) + pending // 8 + 2 >= size or rows * 8 >= 65500:
+            break
+    flush()
+
+    head = b"\xFF\xD8"
+    head += _segment(0xE0, b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
+    head += _segment(0xDB, b"\x00" + bytes(rng.randrange(1, 256) for _ in range(64)))
+    head += _segment(0xC0, struct.pack(">BHHB", 8, rows * 8, cols * 8, 1) + b"\x01\x11\x00")
+    head += _segment(0xC4, b"\x00" + _DC_COUNTS + _DC_SYMBOLS)
+    head += _segment(0xC4, b"\x10" + _AC_COUNTS + _AC_SYMBOLS)
+    if restart_interval:
+        head += _segment(0xDD, struct.pack(">H", restart_interval))
+    head += _segment(0xDA, b"\x01\x01\x00\x00\x3F\x00")
+    return head + bytes(body) + b"\xFF\xD9"
+
+
+def make_mp4(rng: random.Random, size: int) -> bytes:
+    ftyp = b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2"
+    return ftyp + rng.randbytes(max(size - len(ftyp), 0))
+
+
+def make_text(rng: random.Random, size: int) -> bytes:
+    words = [b"lorem", b"ipsum", b"dolor", b"sit", b"amet", b"case", b"evidence", b"card", b"image"]
+    out = bytearray()
+    while len(out) < size:
+        out += b" ".join(rng.choice(words) for _ in range(12)) + b"\r\n"
+    return bytes(out[:size])
+
+
+def _fat_date_time(rng: random.Random):
+    """Random (date, time) pair in FAT packed format between 2005 and 2025."""
+    year, month, day = rng.randrange(2005, 2026), rng.randrange(1, 13), rng.randrange(1, 29)
+    hour, minute, sec = rng.randrange(24), rng.randrange(60), rng.randrange(0, 60, 2)
+    date = ((year - 1980) << 9) | (month << 5) | day
+    time = (hour << 11) | (minute << 5) | (sec // 2)
+    return date, time
+
+
+def _dir_entry(name: str, ext: str, first_cluster: int, filesize: int, deleted: bool, rng: random.Random) -> bytes:
+    raw = name.encode("ascii").ljust(8, b" ")[:8] + ext.encode("ascii").ljust(3, b" ")[:3]
+    if deleted:
+        raw = b"\xE5" + raw[1:]
+    crt_date, crt_time = _fat_date_time(rng)
+    wrt_date, wrt_time = _fat_date_time(rng)
+    return raw + struct.pack(
+        "<BBBHHHHHHHI",
+        0x20, 0, rng.randrange(200), crt_time, crt_date, wrt_date,
+        first_cluster >> 16, wrt_time, wrt_date, first_cluster & 0xFFFF, filesize,
+    )
+
+
+def _geometry(cfg: SynthConfig):
+    spc = cfg.cluster_size // BYTES_PER_SECTOR
+    if spc < 1 or spc * BYTES_PER_SECTOR != cfg.cluster_size:
+        raise ValueError("cluster_size must be a multiple of 512")
+    total_sectors = cfg.size // BYTES_PER_SECTOR
+    fat_sectors = 1
+    while True:
+        clusters = (total_sectors - RESERVED_SECTORS - NUM_FATS * fat_sectors) // spc
+        needed = -(-((clusters + 2) * 4) // BYTES_PER_SECTOR)
+        if needed <= fat_sectors:
+            break
+        fat_sectors = needed
+    if clusters < ROOT_DIR_CLUSTERS + 1:
+        raise ValueError("Image too small for the requested cluster size.")
+    return spc, total_sectors, fat_sectors, clusters
+
+
+def _boot_sector(spc: int, total_sectors: int, fat_sectors: int) -> bytes:
+    b = bytearray(512)
+    b[0:3] = b"\xEB\x58\x90"
+    b[3:11] = b"SYNTHFAT"
+    struct.pack_into("<HBHB", b, 11, BYTES_PER_SECTOR, spc, RESERVED_SECTORS, NUM_FATS)
+    b[21] = 0xF8
+    struct.pack_into("<HHI", b, 24, 63, 255, 0)
+    struct.pack_into("<I", b, 32, total_sectors)
+    struct.pack_into("<IHHIHH", b, 36, fat_sectors, 0, 0, ROOT_CLUSTER, 1, 6)
+    b[64] = 0x80
+    b[66] = 0x29
+    b[71:82] = b"SYNTH      "
+    b[82:90] = b"FAT32   "
+    b[510:512] = b"\x55\xAA"
+    return bytes(b)
+
+
+def _split(n: int, parts: int, rng: random.Random):
+    cuts = sorted(rng.sample(range(1, n), parts - 1))
+    return [b - a for a, b in zip([0] + cuts, cuts + [n])]
+
+
+def generate_image(path: str, cfg: SynthConfig) -> dict:
+    """Write a synthetic FAT32 image to `path` and return its ground-truth manifest."""
+    rng = random.Random(cfg.seed)
+    spc, total_sectors, fat_sectors, clusters = _geometry(cfg)
+    if cfg.gap_fill not in ("zero", "text", "random"):
+        raise ValueError(f"Unknown gap_fill: {cfg.gap_fill}")
+    samples = []
+    for src in cfg.jpeg_sources:
+        with open(src, "rb") as f:
+            samples.append(f.read())
+    max_entries = ROOT_DIR_CLUSTERS * cfg.cluster_size // 32
+    if cfg.num_files > max_entries:
+        raise ValueError(f"At most {max_entries} files fit in the root directory window.")
+
+    data_offset = (RESERVED_SECTORS + NUM_FATS * fat_sectors) * BYTES_PER_SECTOR
+    last_cluster = clusters + 1
+    fat = [0] * (clusters + 2)
+    fat[0], fat[1] = FAT_MEDIA, FAT_EOC
+    for c in range(ROOT_CLUSTER, ROOT_CLUSTER + ROOT_DIR_CLUSTERS):
+        fat[c] = c + 1
+    fat[ROOT_CLUSTER + ROOT_DIR_CLUSTERS - 1] = FAT_EOC
+
+    def cluster_offset(c):
+        return data_offset + (c - 2) * cfg.cluster_size
+
+    files = []
+    orphans = []
+    dir_table = bytearray()
+    cursor = ROOT_CLUSTER + ROOT_DIR_CLUSTERS
+
+    # file sizes are drawn as we go, so capacity is only known while writing;
+    # never leave a half-written image (no BPB/FAT yet) behind on failure
+    try:
+        with open(path, "wb") as img:
+            img.truncate(total_sectors * BYTES_PER_SECTOR)
+
+            def fill_gap(first, count):
+                if cfg.gap_fill == "zero":
+                    return
+                if first + count > last_cluster:
+                    raise ValueError("Image too small for the requested files; increase size.")
+                length = count * cfg.cluster_size
+                if cfg.gap_fill == "text":
+                    filler = make_text(rng, length)
+                else:
+                    # high-entropy data, like a compressed archive
+                    filler = rng.randbytes(length)
+                write_clusters(filler, range(first, first + count))
+
+            def write_clusters(data, chain):
+                for i, c in enumerate(chain):
+                    img.seek(cluster_offset(c))
+                    img.write(data[i * cfg.cluster_size:(i + 1) * cfg.cluster_size])
+
+            for i in range(cfg.num_files):
+                kind = rng.choice(("JPEG", "JPEG", "MP4", "TEXT"))
+                size = rng.randrange(cfg.min_file_size, cfg.max_file_size + 1)
+                if kind == "JPEG" and samples:
+                    data = samples[sum(f["format"] == "JPEG" for f in files) % len(samples)]
+                elif kind == "JPEG":
+                    data = make_jpeg(rng, size, cfg.restart_interval)
+                elif kind == "MP4":
+                    data = make_mp4(rng, size)
+                else:
+                    data = make_text(rng, size)
+                size = len(data)
+                n = -(-size // cfg.cluster_size)
+
+                parts = 1
+                if n > 1 and rng.random() < cfg.fragmentation:
+                    parts = min(n, rng.randrange(2, 5))
+                chain = []
+                for run in _split(n, parts, rng) if parts > 1 else [n]:
+                    if chain:
+                        gap = rng.randrange(1, 9)  # leave a gap between fragments
+                        fill_gap(cursor, gap)
+                        cursor += gap
+                    chain.extend(range(cursor, cursor + run))
+                    cursor += run
+                if cursor > last_cluster:
+                    raise ValueError("Image too small for the requested files; increase size.")
+
+                deleted = rng.random() < cfg.deleted_ratio
+                mislabeled = rng.random() < cfg.mislabeled_ratio
+                if mislabeled:
+                    ext = rng.choice(WRONG_EXT[kind])
+                else:
+                    ext = {"JPEG": "JPG", "MP4": "MP4", "TEXT": "TXT"}[kind]
+
+                write_clusters(data, chain)
+                if not deleted:
+                    # deleting a file on FAT32 zeroes its chain; only live files keep one
+                    for a, b in zip(chain, chain[1:]):
+                        fat[a] = b
+                    fat[chain[-1]] = FAT_EOC
+
+                name = f"F{i:07d}"
+                entry_offset = cluster_offset(ROOT_CLUSTER) + len(dir_table)
+                dir_table += _dir_entry(name, ext, chain[0], size, deleted, rng)
+                files.append({
+                    "name": name, "ext": ext, "format": kind, "size": size,
+                    "first_cluster": chain[0], "clusters": chain, "deleted": deleted,
+                    "mislabeled": mislabeled, "fragmented": parts > 1, "entry_offset": entry_offset,
+                })
+
+            for _ in range(cfg.orphans):
+                cursor += rng.randrange(1, 4)
+                data = make_jpeg(rng, rng.randrange(cfg.min_file_size, cfg.max_file_size + 1), cfg.restart_interval)
+                n = -(-len(data) // cfg.cluster_size)
+                if cursor + n > last_cluster:
+                    raise ValueError("Image too small for the requested orphans; increase size.")
+                write_clusters(data, range(cursor, cursor + n))
+                orphans.append({"first_cluster": cursor, "offset": cluster_offset(cursor), "size": len(data)})
+                cursor += n
+
+            img.seek(0)
+            img.write(_boot_sector(spc, total_sectors, fat_sectors))
+            fat_bytes = struct.pack(f"<{len(fat)}I", *fat).ljust(fat_sectors * BYTES_PER_SECTOR, b"\x00")
+            for k in range(NUM_FATS):
+                img.seek((RESERVED_SECTORS + k * fat_sectors) * BYTES_PER_SECTOR)
+                img.write(fat_bytes)
+            img.seek(cluster_offset(ROOT_CLUSTER))
+            img.write(bytes(dir_table))
+
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return {
+        "path": path,
+        "config": asdict(cfg),
+        "data_offset": data_offset,
+        "clusters": clusters,
+        "files": files,
+        "orphans": orphans,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic FAT32 image for benchmarking")
+    parser.add_argument("out", help="Path of the image to write")
+    parser.add_argument("--size-mb", type=int, default=64, help="Image size in MiB")
+    parser.add_argument("--cluster-size", type=int, default=4096)
+    parser.add_argument("--files", type=int, default=200, help="Number of directory entries to create")
+    parser.add_argument("--deleted-ratio", type=float, default=0.3)
+    parser.add_argument("--fragmentation", type=float, default=0.0, help="Probability a file is split into fragments")
+    parser.add_argument("--mislabeled-ratio", type=float, default=0.1)
+    parser.add_argument("--orphans", type=int, default=5, help="JPEGs written to free space with no entry")
+    parser.add_argument("--gap-fill", choices=("zero", "text", "random"), default="zero",
+                        help="Data written into the gaps between fragments")
+    parser.add_argument("--restart-interval", type=int, default=32, help="MCUs between JPEG restart markers (0 = none)")
+    parser.add_argument("--jpeg-from", metavar="FILE", nargs="+", default=[],
+                        help="Use these real JPEG files, in turn, instead of generated JPEGs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--manifest", metavar="JSON", help="Write the ground-truth manifest here")
+    args = parser.parse_args()
+
+    cfg = SynthConfig(
+        size=args.size_mb * 1024 * 1024, cluster_size=args.cluster_size, num_files=args.files,
+        deleted_ratio=args.deleted_ratio, fragmentation=args.fragmentation,
+        mislabeled_ratio=args.mislabeled_ratio, orphans=args.orphans, gap_fill=args.gap_fill,
+        restart_interval=args.restart_interval, jpeg_sources=args.jpeg_from, seed=args.seed,
+    )
+    manifest = generate_image(args.out, cfg)
+    if args.manifest:
+        with open(args.manifest, "w") as f:
+            json.dump(manifest, f, indent=2)
+    print(f"Wrote {args.out}: {len(manifest['files'])} files, {len(manifest['orphans'])} orphans.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Timeline index and export over directory-entry timestamps.
+#
+# TimelineIndex keeps one sorted list of timestamps per event kind, so range
+# queries ("deleted files modified between X and Y") are two bisects.
+# export_timeline writes every event in time order using sorted runs on disk
+# and a k-way merge, so the whole timeline never has to fit in memory.
+import bisect
+import csv
+import heapq
+import os
+import tempfile
+from datetime import date, datetime, time
+
+from entry_table import _fat_date, fat_datetime
+
+KINDS = ("created", "modified", "accessed")
+COLUMNS = ["timestamp", "event", "name", "deleted", "first_cluster", "filesize", "entry_offset"]
+# EntryTable columns holding the packed FAT timestamp words
+_STAMP_COLUMNS = ("crt_date", "crt_time", "crt_tenths", "wrt_date", "wrt_time", "acc_date")
+
+
+def _as_datetime(value, end: bool = False):
+    """Normalise a datetime, date or ISO string; a bare date means the start
+    of that day, or its last instant when `end` is set."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value) if len(value) > 10 else date.fromisoformat(value)
+    if isinstance(value, datetime) or value is None:
+        return value
+    # access times are dates only
+    return datetime.combine(value, time.max if end else time())
+
+
+def entry_events(entries):
+    """Yield (timestamp, kind, entry) for every timestamp set on each entry."""
+    for e in entries:
+        for kind in KINDS:
+            stamp = _as_datetime(getattr(e, kind, None))
+            if stamp is not None:
+                yield stamp, kind, e
+
+
+def _table_stamps(table, extra=()):
+    """Yield (index, {kind: timestamp}, *extra columns) per EntryTable row, read column-wise."""
+    for batch in table.batches(columns=_STAMP_COLUMNS + tuple(extra)):
+        for i, cd, ct, cx, wd, wt, ad, *rest in zip(range(batch["start"], len(table)),
+                                                    *(batch[c] for c in _STAMP_COLUMNS + tuple(extra))):
+            stamps = {}
+            if cd:
+                stamps["created"] = fat_datetime(cd, ct, cx)
+            if wd:
+                stamps["modified"] = fat_datetime(wd, wt)
+            if ad:
+                stamps["accessed"] = _as_datetime(_fat_date(ad))
+            yield (i, stamps, *rest)
+
+
+class TimelineIndex:
+    def __init__(self, entries):
+        # an EntryTable is read column-wise and kept as is; other iterables are copied
+        self._table = hasattr(entries, "batches")
+        self.entries = entries if self._table else list(entries)
+        self._times = {}
+        self._rows = {}
+        # single pass over the entries, then sort each kind once
+        per_kind = {kind: [] for kind in KINDS}
+        if self._table:
+            for i, stamps in _table_stamps(entries):
+                for kind, stamp in stamps.items():
+                    if stamp is not None:
+                        per_kind[kind].append((stamp, i))
+        else:
+            for i, e in enumerate(self.entries):
+                for kind in KINDS:
+                    stamp = _as_datetime(getattr(e, kind, None))
+                    if stamp is not None:
+                        per_kind[kind].append((stamp, i))
+        for kind, events in per_kind.items():
+            events.sort()
+            self._times[kind] = [stamp for stamp, _ in events]
+            self._rows[kind] = [i for _, i in events]
+
+    def range(self, start=None, end=None, kind: str = "modified", deleted=None):
+        """Entries whose `kind` timestamp is in [start, end], oldest first.
+
+        `start`/`end` may be datetimes, dates or ISO strings; `deleted`
+        filters on the entry's deleted flag when not None.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown timestamp kind: {kind}")
+        times = self._times[kind]
+        lo = bisect.bisect_left(times, _as_datetime(start)) if start is not None else 0
+        hi = bisect.bisect_right(times, _as_datetime(end, end=True)) if end is not None else len(times)
+        rows = self._rows[kind][lo:hi]
+        if self._table:
+            if deleted is not None:
+                flags = self.entries.deleted
+                rows = [i for i in rows if bool(flags[i]) == deleted]
+            return self.entries.take(rows)
+        return [self.entries[i] for i in rows
+                if deleted is None or bool(self.entries[i].deleted) == deleted]
+
+
+def _key(row):
+    # timestamp, event kind, entry offset (an int in memory, a string once read back from a run)
+    return row[0], row[1], int(row[6])
+
+
+def _row(stamp, kind, e):
+    display_name = f"{e.name}.{e.ext}" if e.ext else e.name
+    # ISO strings sort in time order, which the on-disk runs rely on
+    return [stamp.isoformat(sep=" "), kind, display_name, int(bool(e.deleted)),
+            int(e.first_cluster), int(e.filesize), int(e.entry_offset)]
+
+
+def _event_rows(entries):
+    """CSV rows (see _row) for every timestamp event; EntryTables are read column-wise."""
+    if not hasattr(entries, "batches"):
+        for stamp, kind, e in entry_events(entries):
+            yield _row(stamp, kind, e)
+        return
+    extra = ("name", "ext", "deleted", "first_cluster", "filesize", "entry_offset")
+    for _, stamps, name, ext, deleted, cluster, size, offset in _table_stamps(entries, extra):
+        for kind in KINDS:
+            stamp = stamps.get(kind)
+            if stamp is not None:
+                yield [stamp.isoformat(sep=" "), kind, f"{name}.{ext}" if ext else name, int(bool(deleted)),
+                       cluster, size, offset]
+
+
+def export_timeline(entries, out: str, run_size: int = 100_000) -> str:
+    """Write every timestamp event of `entries` (any iterable) to CSV in time order.
+
+    Events are sorted in runs of `run_size`, each spilled to a temp file, and
+    the runs are merged; memory use is bounded by one run.
+    """
+    runs = []
+    buf = []
+    try:
+        for row in _event_rows(entries):
+            buf.append(row)
+            if len(buf) >= run_size:
+                runs.append(_spill(buf))
+                buf = []
+        buf.sort(key=_key)
+        files = [open(path, newline="") for path in runs]
+        try:
+            merged = heapq.merge(buf, *(csv.reader(f) for f in files), key=_key)
+            with open(out, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS)
+                writer.writerows(merged)
+        finally:
+            for f in files:
+                f.close()
+    finally:
+        for path in runs:
+            os.remove(path)
+    return os.path.abspath(out)
+
+
+def _spill(rows) -> str:
+    rows.sort(key=_key)
+    fd, path = tempfile.mkstemp(prefix="timeline_", suffix=".csv")
+    with os.fdopen(fd, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+    return path
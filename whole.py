@@ -1,5 +1,7 @@
 import struct
 import os
+from entry_table import EntryTable
+from jpeg_validator import validate_jpeg
 
 IMAGE = "fake_fat32.img"
 
@@ -15,6 +17,8 @@ DATA_OFFSET = BOOT_SIZE + FAT_SIZE*2 + ROOT_DIR_SIZE
 # ----------------------------
 
 JPEG_SIG = b"\xFF\xD8\xFF"
+# carved spans scoring below this (see jpeg_validator) are treated as false positives
+MIN_JPEG_SCORE = 0.6
 
 MP4_SIG_1 = b"\x00\x00\x00\x18\x66\x74\x79\x70"
 MP4_SIG_2 = b"\x00\x00\x00\x14\x66\x74\x79\x70\x69\x73\x6F\x6D"
@@ -51,7 +55,7 @@ def scan_entire_image_for_jpeg():
     return found
 
 def list_entries():
-    entries = []
+    entries = EntryTable()
 
     root_offset = BOOT_SIZE + FAT_SIZE*2
 
@@ -82,13 +86,8 @@ def list_entries():
             # for FAT16 images high will be 0 and this yields the low value as before
             size = struct.unpack("<I", entry[28:32])[0]
 
-            entries.append({
-                "deleted": deleted,
-                "name": name,
-                "ext": ext,
-                "cluster": first_cluster,
-                "size": size
-            })
+            entries.append(name=name, ext=ext, attr=attr, first_cluster=first_cluster,
+                           filesize=size, deleted=deleted, entry_offset=root_offset + i)
 
     return entries
 
@@ -149,6 +148,8 @@ def extract_jpeg_from_cluster(cluster, out_path):
             if idx_end != -1:
                 # include end_sig (2 bytes)
                 jpg_data = buffer[:idx_end+2]
+                if validate_jpeg(jpg_data).score < MIN_JPEG_SCORE:
+                    return False
                 with open(out_path, "wb") as out:
                     out.write(jpg_data)
                 return True
@@ -193,75 +194,74 @@ def analyze_files():
     mp4_wrong_ext = []
     jpeg_correct_ext = []
 
-    for e in entries:
-        name = e["name"]
-        ext = e["ext"].upper()
-        cluster = e["cluster"]
-        size = e["size"]
-        deleted = e["deleted"]
-
-        # Instead of checking only the first 32 bytes, scan the cluster(s) for signatures
-        actual_format = None
-
-        if cluster_contains_jpeg(cluster):
-            actual_format = "JPEG"
-        elif cluster_contains_mp4(cluster):
-            actual_format = "MP4"
-
-        # ------------------------
-        # Compare with extension
-        # ------------------------
-        mismatch = False
-
-        if actual_format == "JPEG" and ext not in ("JPG", "JPEG"):
-            mismatch = True
-
-        if actual_format == "MP4" and ext not in ("MP4", "M4V", "MOV"):
-            mismatch = True
-
-        # Track deleted files
-        if deleted:
-            deleted_files.append({"name": name, "ext": ext, "cluster": cluster, "size": size})
-
-        # Track MP4 files that don't have an MP4-like extension (regardless of deleted state)
-        if actual_format == "MP4" and ext not in ("MP4", "M4V", "MOV"):
-            mp4_wrong_ext.append({"name": name, "ext": ext, "cluster": cluster, "size": size, "deleted": deleted})
-
-        # Track JPEG files that have an appropriate extension (regardless of deleted state)
-        if actual_format == "JPEG" and ext in ("JPG", "JPEG"):
-            jpeg_entry = {"name": name, "ext": ext, "cluster": cluster, "size": size, "deleted": deleted}
-            jpeg_correct_ext.append(jpeg_entry)
-
-            # Attempt extraction and save recovered file. Use cluster and name to build a unique filename.
-            out_dir = "recovered_jpegs"
-            os.makedirs(out_dir, exist_ok=True)
-            safe_name = f"{name}_{cluster}.jpg"
-            out_path = os.path.join(out_dir, safe_name)
-
-            extracted = extract_jpeg_from_cluster(cluster, out_path)
-            if extracted:
-                jpeg_entry["recovered_path"] = out_path
+    columns = ("name", "ext", "first_cluster", "filesize", "deleted")
+    for batch in entries.batches(columns=columns):
+        for name, ext, cluster, size, deleted in zip(*(batch[c] for c in columns)):
+            ext = ext.upper()
+            deleted = bool(deleted)
+
+            # Instead of checking only the first 32 bytes, scan the cluster(s) for signatures
+            actual_format = None
+
+            if cluster_contains_jpeg(cluster):
+                actual_format = "JPEG"
+            elif cluster_contains_mp4(cluster):
+                actual_format = "MP4"
+
+            # ------------------------
+            # Compare with extension
+            # ------------------------
+            mismatch = False
+
+            if actual_format == "JPEG" and ext not in ("JPG", "JPEG"):
+                mismatch = True
+
+            if actual_format == "MP4" and ext not in ("MP4", "M4V", "MOV"):
+                mismatch = True
+
+            # Track deleted files
+            if deleted:
+                deleted_files.append({"name": name, "ext": ext, "cluster": cluster, "size": size})
+
+            # Track MP4 files that don't have an MP4-like extension (regardless of deleted state)
+            if actual_format == "MP4" and ext not in ("MP4", "M4V", "MOV"):
+                mp4_wrong_ext.append({"name": name, "ext": ext, "cluster": cluster, "size": size, "deleted": deleted})
+
+            # Track JPEG files that have an appropriate extension (regardless of deleted state)
+            if actual_format == "JPEG" and ext in ("JPG", "JPEG"):
+                jpeg_entry = {"name": name, "ext": ext, "cluster": cluster, "size": size, "deleted": deleted}
+                jpeg_correct_ext.append(jpeg_entry)
+
+                # Attempt extraction and save recovered file. Use cluster and name to build a unique filename.
+                out_dir = "recovered_jpegs"
+                os.makedirs(out_dir, exist_ok=True)
+                safe_name = f"{name}_{cluster}.jpg"
+                out_path = os.path.join(out_dir, safe_name)
+
+                extracted = extract_jpeg_from_cluster(cluster, out_path)
+                if extracted:
+                    jpeg_entry["recovered_path"] = out_path
+                else:
+                    jpeg_entry["recovered_path"] = None
+
+            # ------------------------
+            # Print per-file findings (existing behaviour)
+            # ------------------------
+            print("-----")
+            print(f"File: {name}.{ext} (cluster {cluster}, size {size})")
+            print(f"Deleted: {'YES' if deleted else 'NO'}")
+
+            if actual_format:
+                print(f"Actual format detected: {actual_format}")
             else:
-                jpeg_entry["recovered_path"] = None
+                print("Actual format: UNKNOWN / Not JPEG or MP4")
 
-        # ------------------------
-        # Print per-file findings (existing behaviour)
-        # ------------------------
-        print("-----")
-        print(f"File: {name}.{ext} (cluster {cluster}, size {size})")
-        print(f"Deleted: {'YES' if deleted else 'NO'}")
-
-        if actual_format:
-            print(f"Actual format detected: {actual_format}")
-        else:
-            print("Actual format: UNKNOWN / Not JPEG or MP4")
-
-        if mismatch:
-            print(" MISMATCH: File contents indicate a different format!")
-        else:
-            print("OK: Extension matches file content.")
+            if mismatch:
+                print(" MISMATCH: File contents indicate a different format!")
+            else:
+                print("OK: Extension matches file content.")
 
-        print("-----\n")
+            print("-----\n")
 
     # ----------------------------
     # Scan for embedded JPEGs (not just those with correct extension)
@@ -294,9 +294,9 @@ def analyze_files():
             print(f"- {j['name']}.{j['ext']} (cluster {j['cluster']}, size {j['size']}, deleted={'YES' if j['deleted'] else 'NO'})")
         for cluster_num, offset in embedded_jpegs:
             # Try to find a matching entry by cluster
-            match = next((e for e in entries if e["cluster"] == cluster_num), None)
+            match = next((entries[i] for i, c in enumerate(entries.first_cluster) if c == cluster_num), None)
             if match:
-                print(f"- {match['name']}.{match['ext']} (cluster {cluster_num}, offset {offset})")
+                print(f"- {match.name}.{match.ext} (cluster {cluster_num}, offset {offset})")
             else:
                 print(f"- [EMBEDDED] Cluster {cluster_num}, Offset {offset}")
     else: